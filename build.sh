@@ -7,4 +7,6 @@ python manage.py collectstatic --no-input
 
 python manage.py migrate
 
+python manage.py createcachetable
+
 python crear_superuser_auto.py
\ No newline at end of file
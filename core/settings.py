@@ -16,6 +16,13 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 # SECURITY WARNING: keep the secret key used in production secret!
 SECRET_KEY = os.environ.get('SECRET_KEY', 'django-insecure-clave-default-local')
 
+# Seudónimo usuario_hash (tickets/anonimato.py). Fijar ANONIMATO_SAL_LEGADO al SECRET_KEY histórico
+# permite rotar SECRET_KEY sin romper los hashes. Para rotar el seudónimo se agrega una clave al final
+# de ANONIMATO_CLAVES (separadas por coma) y se ejecuta `manage.py rotar_hash_anonimo`.
+ANONIMATO_SAL_LEGADO = os.environ.get('ANONIMATO_SAL_LEGADO', SECRET_KEY)
+ANONIMATO_CLAVES = [clave for clave in os.environ.get('ANONIMATO_CLAVES', '').split(',') if clave]
+ANONIMATO_KDF = os.environ.get('ANONIMATO_KDF', 'hkdf-sha256')
+
 # SECURITY WARNING: don't run with debug turned on in production!
 # Si estamos en Render, DEBUG será False. En tu PC será True.
 DEBUG = 'RENDER' not in os.environ
@@ -43,6 +50,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware', # <--- OBLIGATORIO para estáticos en Render
+    'tickets.instrumentacion.InstrumentacionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -51,6 +59,13 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Server-Timing y histograma por vista en /manage/metricas/ (tickets/instrumentacion.py)
+INSTRUMENTACION_ACTIVA = os.environ.get('INSTRUMENTACION_ACTIVA', '1') == '1'
+INSTRUMENTACION_MUESTRAS = 500
+# La cabecera Server-Timing va siempre al staff; a cualquiera solo con esta opción (por defecto en DEBUG)
+INSTRUMENTACION_CABECERA = os.environ.get('INSTRUMENTACION_CABECERA', '1' if DEBUG else '0') == '1'
+INSTRUMENTACION_MAX_VISTAS = 200
+
 ROOT_URLCONF = 'core.urls'
 
 TEMPLATES = [
@@ -78,6 +93,10 @@ DATABASES = {
         conn_max_age=600
     )
 }
+if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+    # BEGIN IMMEDIATE: una transacción de escritura espera su turno (timeout) en vez de fallar
+    # con "database is locked" al pasar de lectura a escritura
+    DATABASES['default'].setdefault('OPTIONS', {}).update({'transaction_mode': 'IMMEDIATE', 'timeout': 20})
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -108,6 +127,29 @@ CLOUDINARY_STORAGE = {
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Procesamiento de evidencias (tickets/imagenes.py): sin EXIF, lado máximo y re-codificación
+EVIDENCIA_FORMATO = 'WEBP'
+EVIDENCIA_MAX_LADO = 1600
+EVIDENCIA_CALIDAD = 80
+EVIDENCIA_MAX_BYTES = 400 * 1024
+MINIATURA_LADO = 160
+MINIATURA_CALIDAD = 70
+VISTA_MEDIA_LADO = 800
+
+# Cambios de estado masivos (tickets/transiciones.py): filas por transacción
+TRANSICIONES_LOTE = 500
+
+# Informes Word por lote (tickets/informes.py). Se generan en un hilo al confirmar el lote, o los toma
+# de la cola el cron de vercel.json (/tareas/procesar-informes/, mismo CRON_SECRET que el correo) o
+# `python manage.py procesar_informes`. En Vercel no hay hilo tras la respuesta ni pool de procesos.
+INFORMES_TRABAJADORES = int(os.environ.get('INFORMES_TRABAJADORES', 1 if 'VERCEL' in os.environ else 2))
+INFORMES_EN_SEGUNDO_PLANO = 'VERCEL' not in os.environ
+INFORMES_LOTES_POR_TAREA = 1
+INFORMES_TIMEOUT_MINUTOS = 30
+INFORME_IMAGEN_LADO = 1200
+INFORMES_CACHE_DIR = os.environ.get('INFORMES_CACHE_DIR')  # por defecto <tmp>/buzon_emi_informes
+INFORMES_CACHE_MAX_MB = 200
+
 if os.getenv('CLOUDINARY_API_KEY'):
     DEFAULT_FILE_STORAGE = 'cloudinary_storage.storage.MediaCloudinaryStorage'
 else:
@@ -130,6 +172,80 @@ EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD')
 # Remitente por defecto
 DEFAULT_FROM_EMAIL = f'Sistema de quejas EMI <{EMAIL_HOST_USER}>'
 
+# Cola de correos (ver tickets/correo.py). Se entrega de tres formas:
+#   - Al confirmar la transacción que encola, un hilo vacía la cola (CORREO_ENVIO_INMEDIATO).
+#   - Vercel: el cron de vercel.json llama a /tareas/procesar-correos/ con "Authorization: Bearer $CRON_SECRET".
+#   - Render u otro servidor: un Cron Job o worker con `python manage.py procesar_correos [--continuo]`.
+# Los dos últimos recogen lo que el hilo no alcanzó a enviar (instancia congelada, SMTP caído, reintentos).
+CORREO_ENVIO_INMEDIATO = os.environ.get('CORREO_ENVIO_INMEDIATO', '1') == '1'
+CRON_SECRET = os.environ.get('CRON_SECRET', '')
+CORREO_LOTE = int(os.environ.get('CORREO_LOTE', 50))
+CORREO_MAX_INTENTOS = int(os.environ.get('CORREO_MAX_INTENTOS', 5))
+CORREO_REINTENTO_SEGUNDOS = int(os.environ.get('CORREO_REINTENTO_SEGUNDOS', 60))
+CORREO_RESERVA_SEGUNDOS = 300
+
+# Registros de la app (logging.getLogger(__name__) en tickets/). Nunca incluyen correos ni datos
+# del reportante; LOG_NIVEL=INFO agrega alertas y spam encolados.
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {'consola': {'class': 'logging.StreamHandler'}},
+    'loggers': {'tickets': {'handlers': ['consola'], 'level': os.environ.get('LOG_NIVEL', 'WARNING')}},
+}
+
+# --- CACHE (límites de tasa del OTP) ---
+# Para compartir los contadores entre procesos usar p.ej. CACHE_BACKEND=django.core.cache.backends.db.DatabaseCache
+# y CACHE_LOCATION=cache_buzon (build.sh ejecuta createcachetable), o Redis/Memcached.
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache')
+CACHE_LOCATION = os.environ.get('CACHE_LOCATION', 'buzon_emi')
+# Redis y Memcached comparten un servidor entre alias (se separan por KEY_PREFIX) y no podan por MAX_ENTRIES
+CACHE_REMOTA = 'redis' in CACHE_BACKEND.lower() or 'memcached' in CACHE_BACKEND.lower()
+# Caché que ven todos los procesos (con LocMem cada proceso tiene la suya)
+CACHE_COMPARTIDA = CACHE_REMOTA or 'DatabaseCache' in CACHE_BACKEND
+
+
+def _cache_aparte(nombre, max_entradas):
+    # Alias propio para que otras claves no desalojen estas (LocMem y DB podan al llegar a MAX_ENTRIES)
+    if CACHE_REMOTA:
+        return {'BACKEND': CACHE_BACKEND, 'LOCATION': CACHE_LOCATION, 'KEY_PREFIX': nombre}
+    return {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': f"{CACHE_LOCATION}_{nombre}",
+        'OPTIONS': {'MAX_ENTRIES': max_entradas},
+    }
+
+
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': CACHE_LOCATION,
+    },
+    'limites': _cache_aparte('limites', 20000),
+    'series': _cache_aparte('series', 100),
+}
+
+# Serie temporal de /transparencia/serie/ (tickets/series.py). invalidar() solo llega a los demás
+# procesos con una caché compartida; con LocMem los períodos cerrados vencen a la hora.
+SERIE_CACHE_ACTUAL_SEGUNDOS = 60
+SERIE_CACHE_CERRADO_SEGUNDOS = None if CACHE_COMPARTIDA else 60 * 60
+
+# Proxies delante de la app que agregan su entrada al final de X-Forwarded-For (Vercel/Render: 1).
+# Con 0 se usa REMOTE_ADDR; las entradas anteriores las escribe el cliente y no se usan.
+PROXIES_CONFIABLES = int(os.environ.get(
+    'PROXIES_CONFIABLES', 1 if 'RENDER' in os.environ or 'VERCEL' in os.environ else 0
+))
+
+# Token bucket por regla: "capacidad" = ráfaga máxima, "por_minuto" = recarga
+LIMITES_TASA = {
+    'otp_email': {'capacidad': 3, 'por_minuto': 1},
+    'otp_ip': {'capacidad': 10, 'por_minuto': 5},
+    'validar_email': {'capacidad': 5, 'por_minuto': 1},
+    'validar_ip': {'capacidad': 20, 'por_minuto': 10},
+}
+
+# Anti-flood por reportante: (ventana en minutos, máximo de quejas en esa ventana)
+LIMITES_QUEJAS = [(1, 3), (60, 15), (24 * 60, 40)]
+
 # --- JAZZMIN SETTINGS (Panel Admin) ---
 JAZZMIN_SETTINGS = {
     "site_title": "Buzón EMI",
@@ -159,6 +275,23 @@ CSRF_TRUSTED_ORIGINS = [
     'https://*.vercel.app',
 ]
 
+# --- SESIONES ---
+# SESION_MODO: "db" (solo BD), "cached_db" (cache + BD) o "cookies" (cookie firmada, sin BD).
+# Por defecto "cached_db" solo con una caché compartida (Redis/Memcached): con LocMem cada proceso
+# tendría su propia copia y vería sesiones viejas tras un cambio hecho en otro proceso.
+# El código OTP nunca se guarda en claro en la sesión, así que el modo cookie es seguro.
+SESSION_ENGINE = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'cookies': 'django.contrib.sessions.backends.signed_cookies',
+}[os.environ.get('SESION_MODO', 'cached_db' if CACHE_REMOTA else 'db')]
+# Las sesiones del flujo estudiante (OTP -> queja) expiran a los 30 minutos
+SESION_ESTUDIANTE_SEGUNDOS = 30 * 60
+
+# OTP_MODO: "sesion" (estado en request.session) o "token" (cookies firmadas, sin estado en el servidor)
+OTP_MODO = os.environ.get('OTP_MODO', 'sesion')
+OTP_VALIDEZ_SEGUNDOS = 10 * 60
+
 SESSION_COOKIE_SECURE = True
 CSRF_COOKIE_SECURE = True
 
@@ -5,9 +5,12 @@ from django.conf.urls.static import static
 
 from django.views.generic.base import RedirectView 
 
+from tickets.instrumentacion import vista_metricas
+
 urlpatterns = [
     path('admin/', RedirectView.as_view(url='/', permanent=False)),
     
+    path('manage/metricas/', admin.site.admin_view(vista_metricas), name='metricas_rendimiento'),
     path('manage/', admin.site.urls),
 
     path('', include('tickets.urls')),
@@ -1,30 +1,65 @@
 import csv
-import os
-from django.conf import settings
+from functools import lru_cache
+
 from django.contrib import admin, messages
-from django.urls import reverse
+from django.shortcuts import get_object_or_404
+from django.urls import get_script_prefix, path, reverse
 from django.utils.html import format_html
-from django.http import HttpResponse
-
-from docx import Document 
-from docx.shared import Inches, Pt
-from docx.enum.text import WD_ALIGN_PARAGRAPH
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
 
-from .models import Categoria, Ticket
+from . import busqueda
+from .documentos import CONTENT_TYPE_DOCX
+from .estadisticas import formatear_duracion, mediana_resolucion_por_categoria
+from .informes import crear_lote, informe_individual
+from .models import Categoria, CorreoPendiente, InformeLote, Ticket, TicketEvento
+from .transiciones import cambiar_estado
 
 admin.site.site_header = "Panel de Control EMI"
 admin.site.site_title = "Buzón EMI"
 admin.site.index_title = "Gestión de Reportes y Sugerencias"
 
+class _Eco:
+    # csv.writer escribe en un "archivo" que devuelve la línea en vez de guardarla
+    def write(self, valor):
+        return valor
+
+
+@lru_cache(maxsize=8)
+def _url_detalle(prefijo):
+    # Un solo reverse() por prefijo; cada fila solo reemplaza el id
+    return reverse('admin:tickets_ticket_change', args=['__id__'])
+
+
 @admin.register(Ticket)
 class TicketAdmin(admin.ModelAdmin):
     list_display = ('miniatura', 'asunto_corto', 'categoria', 'status_coloreado', 'fecha_creacion', 'ver_detalle_boton')
     list_filter = ('estado', 'categoria', 'fecha_creacion')
+    list_select_related = ('categoria',)
     search_fields = ('asunto', 'descripcion')
     readonly_fields = ('fecha_creacion', 'usuario_hash', 'vista_previa_grande')
+    # Columnas que usa el listado (incluye __str__ para los mensajes de las acciones)
+    campos_listado = (
+        'id', 'asunto', 'estado', 'fecha_creacion', 'imagen', 'imagen_miniatura', 'imagen_media',
+        'categoria__nombre',
+    )
 
     actions = ['generar_informe_word', 'exportar_a_csv', 'marcar_resuelto', 'marcar_proceso']
 
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        coincidencia = getattr(request, 'resolver_match', None)
+        if coincidencia and coincidencia.url_name == 'tickets_ticket_changelist':
+            # Sin descripcion ni comentario_admin: son los campos pesados y el listado no los muestra
+            queryset = queryset.only(*self.campos_listado)
+        return queryset
+
+    def get_search_results(self, request, queryset, search_term):
+        if search_term:
+            resultados = busqueda.filtrar(queryset, search_term)
+            if resultados is not None:
+                return resultados, False
+        return super().get_search_results(request, queryset, search_term)
+
     fieldsets = (
         ('Información del Reporte', {
             'fields': ('categoria', 'asunto', 'descripcion', 'fecha_creacion')
@@ -40,98 +75,80 @@ class TicketAdmin(admin.ModelAdmin):
     @admin.action(description="📝 Generar Informe Oficial (Word)")
     def generar_informe_word(self, request, queryset):
         if queryset.count() > 1:
-            self.message_user(request, "⚠️ Por favor, selecciona SOLO UN ticket para el informe Word.", level=messages.ERROR)
+            lote = crear_lote(queryset, request.user)
+            url = reverse('admin:tickets_informelote_changelist')
+            self.message_user(
+                request,
+                format_html('⏳ Generando {} informes en segundo plano. Descárgalos desde <a href="{}">Informes por lote</a>.', lote.total, url),
+                level=messages.INFO,
+            )
             return
-        
-        ticket = queryset.first()
-        doc = Document()
-        
-        titulo = doc.add_heading('ESCUELA MILITAR DE INGENIERÍA', 0)
-        titulo.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        
-        subtitulo = doc.add_paragraph('REPORTE DE INCIDENTE / SUGERENCIA')
-        subtitulo.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        doc.add_paragraph('_' * 70)
-
-        table = doc.add_table(rows=6, cols=2)
-        table.style = 'Table Grid'
-
-        def fill_row(row_idx, label, value):
-            row = table.rows[row_idx]
-            row.cells[0].text = label
-            row.cells[0].paragraphs[0].runs[0].font.bold = True
-            row.cells[1].text = str(value)
-
-        fill_row(0, 'Código de Reporte:', ticket.id)
-        fill_row(1, 'Fecha:', ticket.fecha_creacion.strftime("%d/%m/%Y %H:%M"))
-        fill_row(2, 'Categoría:', ticket.categoria.nombre)
-        fill_row(3, 'Prioridad:', f"Nivel {ticket.categoria.prioridad_base}")
-        fill_row(4, 'Asunto:', ticket.asunto)
-        fill_row(5, 'Estado:', ticket.get_estado_display())
-
-        doc.add_heading('Detalle:', level=2)
-        p = doc.add_paragraph(ticket.descripcion)
-        p.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
-
-        doc.add_heading('Evidencia:', level=2)
-        if ticket.imagen:
-            try:
-                image_path = os.path.join(settings.MEDIA_ROOT, ticket.imagen.name)
-                doc.add_picture(image_path, width=Inches(4))
-                doc.add_paragraph('(Imagen adjunta)')
-            except Exception as e:
-                doc.add_paragraph(f"[Error cargando imagen: {e}]")
-        else:
-            doc.add_paragraph('Sin evidencia fotográfica.')
-
-        linea = doc.add_paragraph('\n\n\n' + ('_' * 40))
-        linea.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        firma = doc.add_paragraph('Firma y Sello del Responsable')
-        firma.alignment = WD_ALIGN_PARAGRAPH.CENTER
-
-        response = HttpResponse(content_type='application/vnd.openxmlformats-officedocument.wordprocessingml.document')
-        filename = f"Informe_EMI_{str(ticket.id)[:6]}.docx"
+
+        ticket = queryset.select_related('categoria').defer(None).first()
+        filename, contenido = informe_individual(ticket)
+        response = HttpResponse(contenido, content_type=CONTENT_TYPE_DOCX)
         response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        doc.save(response)
         return response
 
     @admin.action(description="📄 Descargar Reporte Masivo (Excel/CSV)")
     def exportar_a_csv(self, request, queryset):
-        response = HttpResponse(content_type='text/csv')
+        # Una sola consulta recorrida por bloques: memoria constante aunque se exporten 500k tickets
+        tickets = (
+            queryset.select_related('categoria')
+            .only('id', 'fecha_creacion', 'asunto', 'descripcion', 'estado', 'imagen', 'categoria__nombre')
+            .iterator(chunk_size=2000)
+        )
+        writer = csv.writer(_Eco())
+
+        def filas():
+            yield writer.writerow(['ID', 'Fecha', 'Categoria', 'Asunto', 'Descripcion', 'Estado', 'Tiene Foto'])
+            for ticket in tickets:
+                tiene_foto = "SI" if ticket.imagen else "NO"
+                yield writer.writerow([
+                    ticket.id, ticket.fecha_creacion.strftime("%Y-%m-%d %H:%M"),
+                    ticket.categoria.nombre, ticket.asunto, ticket.descripcion,
+                    ticket.get_estado_display(), tiene_foto
+                ])
+
+        response = StreamingHttpResponse(filas(), content_type='text/csv')
         response['Content-Disposition'] = 'attachment; filename="reporte_quejas_emi.csv"'
-        writer = csv.writer(response)
-        writer.writerow(['ID', 'Fecha', 'Categoria', 'Asunto', 'Descripcion', 'Estado', 'Tiene Foto'])
-        for ticket in queryset:
-            tiene_foto = "SI" if ticket.imagen else "NO"
-            writer.writerow([
-                ticket.id, ticket.fecha_creacion.strftime("%Y-%m-%d %H:%M"),
-                ticket.categoria.nombre, ticket.asunto, ticket.descripcion,
-                ticket.get_estado_display(), tiene_foto
-            ])
         return response
 
+    def save_model(self, request, obj, form, change):
+        # Lo lee la señal que registra el TicketEvento
+        obj._evento_usuario = request.user
+        obj._evento_origen = TicketEvento.Origen.ADMIN
+        super().save_model(request, obj, form, change)
+
+    def _cambiar_estado(self, request, queryset, estado):
+        cambiados = cambiar_estado(queryset, estado, usuario=request.user)
+        self.message_user(request, f"{cambiados} ticket(s) marcados como {estado.label}.", level=messages.SUCCESS)
+
     @admin.action(description="Marcar como RESUELTO")
     def marcar_resuelto(self, request, queryset):
-        queryset.update(estado='RES')
+        self._cambiar_estado(request, queryset, Ticket.Estado.RESUELTO)
 
     @admin.action(description="Marcar como EN PROCESO")
     def marcar_proceso(self, request, queryset):
-        queryset.update(estado='PROC')
+        self._cambiar_estado(request, queryset, Ticket.Estado.EN_PROCESO)
 
     def ver_detalle_boton(self, obj):
-        url = reverse('admin:tickets_ticket_change', args=[obj.id])
+        url = _url_detalle(get_script_prefix()).replace('__id__', str(obj.id))
         return format_html('<a class="button" style="background-color:#003366; color:white; padding:5px 10px; border-radius:5px; text-decoration:none;" href="{}">Ver Informe</a>', url)
     ver_detalle_boton.short_description = "Acción"
 
     def miniatura(self, obj):
+        # Sin versiones (evidencias antiguas) se muestra el original; las genera `manage.py generar_miniaturas`
         if obj.imagen:
-            return format_html('<img src="{}" style="width: 50px; height:50px; object-fit:cover; border-radius:4px;" />', obj.imagen.url)
+            url = obj.imagen_miniatura.url if obj.imagen_miniatura else obj.imagen.url
+            return format_html('<img src="{}" loading="lazy" width="50" height="50" style="object-fit:cover; border-radius:4px;" />', url)
         return "❌"
     miniatura.short_description = "Foto"
 
     def vista_previa_grande(self, obj):
         if obj.imagen:
-            return format_html('<img src="{}" style="max-width: 100%; height:auto; border-radius:8px;" />', obj.imagen.url)
+            url = obj.imagen_media.url if obj.imagen_media else obj.imagen.url
+            return format_html('<a href="{}" target="_blank"><img src="{}" loading="lazy" style="max-width: 100%; height:auto; border-radius:8px;" /></a>', obj.imagen.url, url)
         return "Sin evidencia"
     vista_previa_grande.short_description = "Vista Previa"
 
@@ -146,4 +163,73 @@ class TicketAdmin(admin.ModelAdmin):
 
 @admin.register(Categoria)
 class CategoriaAdmin(admin.ModelAdmin):
-    list_display = ('nombre', 'email_responsable', 'prioridad_base')
\ No newline at end of file
+    list_display = ('nombre', 'email_responsable', 'prioridad_base', 'mediana_resolucion')
+
+    def get_changelist_instance(self, request):
+        # Una consulta agrupada para toda la página, no una por fila
+        cl = super().get_changelist_instance(request)
+        medianas = mediana_resolucion_por_categoria()
+        for categoria in cl.result_list:
+            categoria.resolucion = medianas.get(categoria.pk, (None, 0))
+        return cl
+
+    @admin.display(description="Mediana hasta resolución")
+    def mediana_resolucion(self, obj):
+        mediana, resueltos = getattr(obj, 'resolucion', (None, 0))
+        return f"{formatear_duracion(mediana)} ({resueltos} resueltos)" if resueltos else "—"
+
+@admin.register(CorreoPendiente)
+class CorreoPendienteAdmin(admin.ModelAdmin):
+    list_display = ('asunto', 'destinatarios', 'estado', 'intentos', 'proximo_intento', 'fecha_envio')
+    list_filter = ('estado',)
+    readonly_fields = ('fecha_creacion', 'fecha_envio', 'ultimo_error')
+
+
+@admin.register(TicketEvento)
+class TicketEventoAdmin(admin.ModelAdmin):
+    list_display = ('ticket_id', 'estado_anterior', 'estado_nuevo', 'usuario', 'origen', 'fecha')
+    list_filter = ('estado_nuevo', 'origen', 'fecha')
+    list_select_related = ('usuario',)
+    raw_id_fields = ('ticket',)
+
+    # Registro de auditoría: solo lectura (el borrado queda permitido para poder eliminar tickets con historial)
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(InformeLote)
+class InformeLoteAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'estado', 'barra_progreso', 'solicitado_por', 'fecha_creacion', 'boton_descarga')
+    list_filter = ('estado',)
+    readonly_fields = ('estado', 'total', 'procesados', 'error', 'solicitado_por', 'fecha_creacion', 'fecha_inicio', 'fecha_fin')
+    exclude = ('tickets', 'archivo')
+
+    def has_add_permission(self, request):
+        return False
+
+    def get_urls(self):
+        propias = [
+            path('<int:pk>/descargar/', self.admin_site.admin_view(self.descargar), name='tickets_informelote_descargar'),
+        ]
+        return propias + super().get_urls()
+
+    def descargar(self, request, pk):
+        # El ZIP se entrega por el admin (requiere sesión de staff), no por la URL pública del storage
+        lote = get_object_or_404(InformeLote, pk=pk, estado=InformeLote.Estado.LISTO)
+        if not lote.archivo:
+            raise Http404
+        return FileResponse(lote.archivo.open('rb'), as_attachment=True, filename=f"Informes_EMI_lote_{lote.pk}.zip")
+
+    def barra_progreso(self, obj):
+        return format_html('<progress value="{}" max="100"></progress> {}/{}', obj.progreso, obj.procesados, obj.total)
+    barra_progreso.short_description = "Progreso"
+
+    def boton_descarga(self, obj):
+        if obj.estado == InformeLote.Estado.LISTO:
+            url = reverse('admin:tickets_informelote_descargar', args=[obj.pk])
+            return format_html('<a class="button" href="{}">Descargar ZIP</a>', url)
+        return "—"
+    boton_descarga.short_description = "Archivo"
\ No newline at end of file
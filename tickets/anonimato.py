@@ -0,0 +1,89 @@
+import hashlib
+import hmac
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+# usuario_hash es una cadena de capas:
+#   v0 = sha256(email + ANONIMATO_SAL_LEGADO)           (el hash original del sistema)
+#   vN = HMAC(clave_N, v(N-1))   para cada clave de ANONIMATO_CLAVES, en orden
+# Rotar = agregar una clave al final y ejecutar `manage.py rotar_hash_anonimo`, que aplica solo
+# la capa nueva a las filas existentes (no hace falta conocer los correos).
+
+
+def _hkdf_sha256(secreto, info):
+    # RFC 5869 con una sola ronda de expand (32 bytes)
+    prk = hmac.new(b'buzon-emi', secreto, hashlib.sha256).digest()
+    return hmac.new(prk, info + b'\x01', hashlib.sha256).digest()
+
+
+def _pbkdf2_sha256(secreto, info):
+    return hashlib.pbkdf2_hmac('sha256', secreto, info, 200_000)
+
+
+KDFS = {
+    'hkdf-sha256': _hkdf_sha256,
+    'pbkdf2-sha256': _pbkdf2_sha256,
+}
+
+
+class _EstadoClaves:
+    """HMAC ya inicializados (ipad/opad calculados) para cada versión de clave."""
+
+    def __init__(self, sal_legado, claves, kdf):
+        self.sal_legado = sal_legado
+        derivar = KDFS[kdf]
+        self.capas = [
+            hmac.new(derivar(clave.encode('utf-8'), f"usuario_hash:v{i}".encode()), digestmod=hashlib.sha256)
+            for i, clave in enumerate(claves, start=1)
+        ]
+
+    @property
+    def version(self):
+        return len(self.capas)
+
+    def aplicar(self, valor, desde=0):
+        for capa in self.capas[desde:]:
+            mac = capa.copy()
+            mac.update(valor.encode('ascii'))
+            valor = mac.hexdigest()
+        return valor
+
+    def legado(self, identificador):
+        return hashlib.sha256(f"{identificador}{self.sal_legado}".encode('utf-8')).hexdigest()
+
+
+@lru_cache(maxsize=1)
+def _estado():
+    return _EstadoClaves(
+        settings.ANONIMATO_SAL_LEGADO,
+        tuple(settings.ANONIMATO_CLAVES),
+        settings.ANONIMATO_KDF,
+    )
+
+
+@lru_cache(maxsize=2048)
+def _hash(identificador, estado):
+    return estado.aplicar(estado.legado(identificador))
+
+
+@receiver(setting_changed)
+def _reiniciar(setting, **kwargs):
+    if setting in ('SECRET_KEY', 'ANONIMATO_SAL_LEGADO', 'ANONIMATO_CLAVES', 'ANONIMATO_KDF'):
+        _estado.cache_clear()
+        _hash.cache_clear()
+
+
+def version_actual():
+    return _estado().version
+
+
+def generar_hash_anonimo(identificador):
+    return _hash(identificador, _estado())
+
+
+def actualizar_hash(valor, version):
+    """Lleva un usuario_hash guardado en `version` a la versión vigente."""
+    return _estado().aplicar(valor, desde=version)
@@ -2,4 +2,21 @@ from django.apps import AppConfig
 
 
 class TicketsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
     name = 'tickets'
+
+    def ready(self):
+        from django.db.models.signals import post_migrate
+        from . import signals  # noqa: F401
+        from .instrumentacion import instalar
+        instalar()
+        post_migrate.connect(reparar_busqueda, sender=self)
+
+
+def reparar_busqueda(using, **kwargs):
+    # SQLite reconstruye la tabla de tickets en algunas migraciones y se pierden los triggers de FTS5
+    from django.db import connections
+    from .busqueda import instalar
+    conexion = connections[using]
+    if conexion.vendor == 'sqlite':
+        instalar(conexion)
@@ -0,0 +1,138 @@
+import logging
+import re
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+logger = logging.getLogger(__name__)
+
+# Búsqueda de texto completo sobre asunto + descripción.
+# PostgreSQL: columna tsvector (Ticket.busqueda) mantenida por trigger, índice GIN y stemming en español.
+# SQLite (desarrollo local): tabla virtual FTS5 sincronizada por triggers.
+
+CONFIG_PG = 'spanish'
+
+_PG_INSTALAR = [
+    f"""
+    CREATE OR REPLACE FUNCTION tickets_ticket_busqueda_trigger() RETURNS trigger AS $$
+    BEGIN
+        NEW.busqueda :=
+            setweight(to_tsvector('{CONFIG_PG}', coalesce(NEW.asunto, '')), 'A') ||
+            setweight(to_tsvector('{CONFIG_PG}', coalesce(NEW.descripcion, '')), 'B');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS tickets_ticket_busqueda_update ON tickets_ticket",
+    """
+    CREATE TRIGGER tickets_ticket_busqueda_update
+    BEFORE INSERT OR UPDATE OF asunto, descripcion ON tickets_ticket
+    FOR EACH ROW EXECUTE FUNCTION tickets_ticket_busqueda_trigger()
+    """,
+    f"""
+    UPDATE tickets_ticket SET busqueda =
+        setweight(to_tsvector('{CONFIG_PG}', coalesce(asunto, '')), 'A') ||
+        setweight(to_tsvector('{CONFIG_PG}', coalesce(descripcion, '')), 'B')
+    """,
+    "CREATE INDEX IF NOT EXISTS ticket_busqueda_gin_idx ON tickets_ticket USING gin (busqueda)",
+]
+
+_PG_DESINSTALAR = [
+    "DROP INDEX IF EXISTS ticket_busqueda_gin_idx",
+    "DROP TRIGGER IF EXISTS tickets_ticket_busqueda_update ON tickets_ticket",
+    "DROP FUNCTION IF EXISTS tickets_ticket_busqueda_trigger()",
+]
+
+_SQLITE_TABLA = """
+    CREATE VIRTUAL TABLE tickets_ticket_fts USING fts5(
+        ticket_id UNINDEXED, asunto, descripcion,
+        tokenize = 'unicode61 remove_diacritics 2'
+    )
+"""
+
+# Con IF NOT EXISTS para poder reinstalarlos después de que SQLite reconstruya la tabla en una migración
+_SQLITE_TRIGGERS = [
+    """
+    CREATE TRIGGER IF NOT EXISTS tickets_ticket_fts_ai AFTER INSERT ON tickets_ticket BEGIN
+        INSERT INTO tickets_ticket_fts (ticket_id, asunto, descripcion) VALUES (new.id, new.asunto, new.descripcion);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tickets_ticket_fts_ad AFTER DELETE ON tickets_ticket BEGIN
+        DELETE FROM tickets_ticket_fts WHERE ticket_id = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS tickets_ticket_fts_au AFTER UPDATE OF asunto, descripcion ON tickets_ticket BEGIN
+        UPDATE tickets_ticket_fts SET asunto = new.asunto, descripcion = new.descripcion WHERE ticket_id = new.id;
+    END
+    """,
+]
+
+_SQLITE_DESINSTALAR = [
+    "DROP TRIGGER IF EXISTS tickets_ticket_fts_ai",
+    "DROP TRIGGER IF EXISTS tickets_ticket_fts_ad",
+    "DROP TRIGGER IF EXISTS tickets_ticket_fts_au",
+    "DROP TABLE IF EXISTS tickets_ticket_fts",
+]
+
+
+def _sqlite_tiene_fts(cursor):
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'tickets_ticket_fts'")
+    return cursor.fetchone() is not None
+
+
+def instalar(conexion=connection):
+    """Crea (o repara) el índice de texto completo. Es idempotente."""
+    with conexion.cursor() as cursor:
+        if conexion.vendor == 'postgresql':
+            cursor.execute("SELECT 1 FROM pg_trigger WHERE tgname = 'tickets_ticket_busqueda_update'")
+            if cursor.fetchone() is None:
+                for sql in _PG_INSTALAR:
+                    cursor.execute(sql)
+        elif conexion.vendor == 'sqlite':
+            if not _sqlite_tiene_fts(cursor):
+                try:
+                    cursor.execute(_SQLITE_TABLA)
+                except Exception:
+                    logger.warning("SQLite sin FTS5, la búsqueda usará LIKE", exc_info=True)
+                    return
+                cursor.execute(
+                    "INSERT INTO tickets_ticket_fts (ticket_id, asunto, descripcion) "
+                    "SELECT id, asunto, descripcion FROM tickets_ticket"
+                )
+            for sql in _SQLITE_TRIGGERS:
+                cursor.execute(sql)
+
+
+def desinstalar(conexion=connection):
+    sentencias = {'postgresql': _PG_DESINSTALAR, 'sqlite': _SQLITE_DESINSTALAR}.get(conexion.vendor, [])
+    with conexion.cursor() as cursor:
+        for sql in sentencias:
+            cursor.execute(sql)
+
+
+def _expresion_fts5(termino):
+    # Cada palabra entre comillas (evita la sintaxis de FTS5) y con prefijo: "proyec"* AND "aula"*
+    palabras = re.findall(r'\w+', termino)
+    return ' '.join(f'"{palabra}"*' for palabra in palabras)
+
+
+def filtrar(queryset, termino):
+    """Filtra por texto completo. Devuelve None si la base de datos no tiene índice de texto."""
+    if connection.vendor == 'postgresql':
+        from django.contrib.postgres.search import SearchQuery
+        return queryset.filter(busqueda=SearchQuery(termino, config=CONFIG_PG, search_type='websearch'))
+
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            if not _sqlite_tiene_fts(cursor):
+                return None
+        expresion = _expresion_fts5(termino)
+        if not expresion:
+            return queryset.none()
+        return queryset.filter(pk__in=RawSQL(
+            "SELECT ticket_id FROM tickets_ticket_fts WHERE tickets_ticket_fts MATCH %s", [expresion]
+        ))
+
+    return None
@@ -0,0 +1,114 @@
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import CorreoPendiente
+
+logger = logging.getLogger(__name__)
+
+
+def encolar_correo(asunto, mensaje, destinatarios, remitente=None):
+    # Inserta la fila; tras el commit se intenta enviar en un hilo. Si el hilo no llega
+    # (instancia congelada, SMTP caído), el cron o el comando procesar_correos lo reintenta.
+    if isinstance(destinatarios, str):
+        destinatarios = [destinatarios]
+    correo = CorreoPendiente.objects.create(
+        asunto=asunto[:255],
+        mensaje=mensaje,
+        remitente=remitente or settings.DEFAULT_FROM_EMAIL,
+        destinatarios=','.join(email.strip() for email in destinatarios),
+    )
+    if settings.CORREO_ENVIO_INMEDIATO:
+        transaction.on_commit(lanzar_envio)
+    return correo
+
+
+def lanzar_envio():
+    threading.Thread(target=_enviar_en_hilo, daemon=True).start()
+
+
+def _enviar_en_hilo():
+    try:
+        procesar_pendientes()
+    except Exception:
+        logger.exception("Error enviando la cola de correo")
+    finally:
+        connection.close()
+
+
+def _reservar_lote(limite):
+    # Marca el lote como "en vuelo" moviendo proximo_intento hacia adelante, así otro
+    # worker no lo toma mientras esperamos al SMTP fuera de la transacción.
+    ahora = timezone.now()
+    reserva = ahora + timedelta(seconds=settings.CORREO_RESERVA_SEGUNDOS)
+    with transaction.atomic():
+        pendientes = list(
+            CorreoPendiente.objects
+            .select_for_update(skip_locked=True)
+            .filter(estado=CorreoPendiente.Estado.PENDIENTE, proximo_intento__lte=ahora)
+            .order_by('proximo_intento')[:limite]
+        )
+        if pendientes:
+            CorreoPendiente.objects.filter(pk__in=[c.pk for c in pendientes]).update(proximo_intento=reserva)
+    return pendientes
+
+
+def _registrar_fallo(correo, error):
+    correo.intentos += 1
+    correo.ultimo_error = str(error)[:2000]
+    if correo.intentos >= settings.CORREO_MAX_INTENTOS:
+        correo.estado = CorreoPendiente.Estado.FALLIDO
+    else:
+        espera = settings.CORREO_REINTENTO_SEGUNDOS * (2 ** (correo.intentos - 1))
+        correo.proximo_intento = timezone.now() + timedelta(seconds=espera)
+    correo.save(update_fields=['intentos', 'ultimo_error', 'estado', 'proximo_intento'])
+
+
+def procesar_pendientes(limite=None):
+    """Envía un lote de la cola usando una sola conexión SMTP. Devuelve (enviados, fallidos)."""
+    pendientes = _reservar_lote(limite or settings.CORREO_LOTE)
+    if not pendientes:
+        return 0, 0
+
+    enviados = fallidos = 0
+    conexion = get_connection(fail_silently=False)
+    try:
+        conexion.open()
+    except Exception as e:
+        logger.exception("Error abriendo la conexión SMTP")
+        for correo in pendientes:
+            _registrar_fallo(correo, e)
+        return 0, len(pendientes)
+
+    try:
+        for correo in pendientes:
+            mensaje = EmailMessage(
+                correo.asunto,
+                correo.mensaje,
+                correo.remitente or settings.DEFAULT_FROM_EMAIL,
+                correo.lista_destinatarios(),
+                connection=conexion,
+            )
+            try:
+                mensaje.send(fail_silently=False)
+            except Exception as e:
+                # Sin el mensaje de la excepción: los rechazos SMTP incluyen la dirección del destinatario
+                # (el detalle queda en CorreoPendiente.ultimo_error)
+                logger.error("Error enviando el correo %s: %s", correo.pk, type(e).__name__)
+                _registrar_fallo(correo, e)
+                fallidos += 1
+                continue
+            correo.estado = CorreoPendiente.Estado.ENVIADO
+            correo.fecha_envio = timezone.now()
+            correo.intentos += 1
+            correo.save(update_fields=['estado', 'fecha_envio', 'intentos'])
+            enviados += 1
+    finally:
+        conexion.close()
+
+    return enviados, fallidos
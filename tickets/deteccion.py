@@ -0,0 +1,106 @@
+import unicodedata
+from collections import namedtuple, deque
+
+PALABRAS_CLAVE = ['robo', 'fuego', 'incendio', 'acoso', 'golpe', 'sangre', 'amenaza', 'urgente']
+SPAM = ['puta', 'puto', 'pt', 'pta', 'ptm', 'mierda', 'mrd', 'mrda', 'carajo', 'crj', 'coño', 'joder', 'jdr', 'culo', 'klo', 'verga', 'vrg', 'vga', 'pija', 'cabrón', 'cabron', 'cbron', 'pelotudo', 'pelotuda', 'pltd', 'imbécil', 'imbecil', 'imb', 'idiota', 'idio', 'estúpido', 'estupido', 'stpd', 'pendejo', 'pendeja', 'pndj', 'chupa', 'chupala', 'mierdero', 'mamón', 'mamon', 'mmn', 'gil', 'gilazo', 'cojudo', 'cojuda', 'kjd', 'huevón', 'huevon', 'wevon', 'wvon', 'huevada', 'webada', 'wbda', 'cagado', 'cagada', 'cgd', 'zorra', 'perra', 'maldito', 'maldita', 'asqueroso', 'asquerosa', 'hijo de puta', 'hdp', 'la puta', 'lpt']
+
+Coincidencias = namedtuple('Coincidencias', ['alertas', 'spam'])
+
+
+# Solo tilde aguda y diéresis: la virgulilla de la ñ se conserva ("año" no es "ano")
+MARCAS_IGNORADAS = {'\u0301', '\u0308'}
+
+
+def normalizar(texto):
+    # Minúsculas, sin tildes y con los espacios colapsados: "Cabrón  X" -> "cabron x"
+    descompuesto = unicodedata.normalize('NFD', texto.lower())
+    sin_tildes = unicodedata.normalize('NFC', ''.join(c for c in descompuesto if c not in MARCAS_IGNORADAS))
+    return ' '.join(sin_tildes.split())
+
+
+class MotorPalabras:
+    """Autómata Aho-Corasick que busca todas las listas en una sola pasada del texto."""
+
+    def __init__(self, grupos):
+        self._transiciones = [{}]
+        self._fallo = [0]
+        self._salida = [[]]
+
+        for grupo, palabras in grupos.items():
+            for palabra in palabras:
+                patron = normalizar(palabra)
+                if patron:
+                    self._agregar(patron, grupo, palabra)
+        self._enlazar()
+
+    def _agregar(self, patron, grupo, palabra):
+        nodo = 0
+        for caracter in patron:
+            siguiente = self._transiciones[nodo].get(caracter)
+            if siguiente is None:
+                siguiente = len(self._transiciones)
+                self._transiciones[nodo][caracter] = siguiente
+                self._transiciones.append({})
+                self._fallo.append(0)
+                self._salida.append([])
+            nodo = siguiente
+        self._salida[nodo].append((len(patron), grupo, palabra))
+
+    def _enlazar(self):
+        # BFS para calcular los enlaces de fallo y heredar las salidas de los sufijos
+        cola = deque(self._transiciones[0].values())
+        while cola:
+            nodo = cola.popleft()
+            for caracter, hijo in self._transiciones[nodo].items():
+                cola.append(hijo)
+                fallo = self._fallo[nodo]
+                while fallo and caracter not in self._transiciones[fallo]:
+                    fallo = self._fallo[fallo]
+                destino = self._transiciones[fallo].get(caracter, 0)
+                self._fallo[hijo] = destino if destino != hijo else 0
+                self._salida[hijo] = self._salida[hijo] + self._salida[self._fallo[hijo]]
+
+    def buscar(self, texto):
+        """Devuelve {grupo: {palabras}} con las coincidencias de palabra completa."""
+        texto = normalizar(texto)
+        encontradas = {}
+        transiciones, fallo, salida = self._transiciones, self._fallo, self._salida
+        nodo = 0
+        ultimo = len(texto) - 1
+
+        for i, caracter in enumerate(texto):
+            while nodo and caracter not in transiciones[nodo]:
+                nodo = fallo[nodo]
+            nodo = transiciones[nodo].get(caracter, 0)
+            if not salida[nodo]:
+                continue
+            # Solo cuenta si la palabra no está pegada a otras letras ("pt" no dispara en "concepto")
+            if i < ultimo and texto[i + 1].isalnum():
+                continue
+            for largo, grupo, palabra in salida[nodo]:
+                inicio = i - largo + 1
+                if inicio > 0 and texto[inicio - 1].isalnum():
+                    continue
+                encontradas.setdefault(grupo, set()).add(palabra)
+
+        return encontradas
+
+
+_MOTOR = MotorPalabras({'alertas': PALABRAS_CLAVE, 'spam': SPAM})
+
+
+def obtener_motor():
+    # Las listas son constantes del módulo: el autómata se arma una vez al importar
+    return _MOTOR
+
+
+def analizar_texto(texto):
+    encontradas = obtener_motor().buscar(texto)
+    return Coincidencias(
+        alertas=frozenset(encontradas.get('alertas', ())),
+        spam=frozenset(encontradas.get('spam', ())),
+    )
+
+
+def analizar_ticket(ticket):
+    return analizar_texto(f"{ticket.asunto} {ticket.descripcion}")
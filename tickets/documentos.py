@@ -0,0 +1,102 @@
+import copy
+from functools import lru_cache
+from io import BytesIO
+
+from docx import Document
+from docx.shared import Inches
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+
+# Este módulo no importa modelos: renderizar_informe corre también en procesos del pool de informes.
+
+CONTENT_TYPE_DOCX = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+
+ETIQUETAS = ['Código de Reporte:', 'Fecha:', 'Categoría:', 'Prioridad:', 'Asunto:', 'Estado:']
+
+
+def datos_de_ticket(ticket, imagen=None, imagen_error=None):
+    """Extrae lo que necesita el informe en tipos simples (se envía a otros procesos)."""
+    return {
+        'id': str(ticket.id),
+        'fecha': ticket.fecha_creacion.strftime("%d/%m/%Y %H:%M"),
+        'categoria': ticket.categoria.nombre,
+        'prioridad': ticket.categoria.prioridad_base,
+        'asunto': ticket.asunto,
+        'estado': ticket.get_estado_display(),
+        'descripcion': ticket.descripcion,
+        'imagen': imagen,
+        'imagen_error': imagen_error,
+    }
+
+
+def nombre_informe(datos):
+    return f"Informe_EMI_{datos['id'][:6]}.docx"
+
+
+@lru_cache(maxsize=1)
+def _plantilla():
+    """Documento base armado una sola vez por proceso; cada informe trabaja sobre una copia."""
+    doc = Document()
+
+    titulo = doc.add_heading('ESCUELA MILITAR DE INGENIERÍA', 0)
+    titulo.alignment = WD_ALIGN_PARAGRAPH.CENTER
+
+    subtitulo = doc.add_paragraph('REPORTE DE INCIDENTE / SUGERENCIA')
+    subtitulo.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    doc.add_paragraph('_' * 70)
+
+    table = doc.add_table(rows=len(ETIQUETAS), cols=2)
+    table.style = 'Table Grid'
+    for row, label in zip(table.rows, ETIQUETAS):
+        row.cells[0].text = label
+        row.cells[0].paragraphs[0].runs[0].font.bold = True
+
+    # Se guardan las posiciones de los párrafos que se completan en cada informe
+    doc.add_heading('Detalle:', level=2)
+    i_detalle = len(doc.paragraphs)
+    detalle = doc.add_paragraph()
+    detalle.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
+
+    doc.add_heading('Evidencia:', level=2)
+    i_evidencia = len(doc.paragraphs)
+    doc.add_paragraph()  # imagen o "Sin evidencia fotográfica."
+    doc.add_paragraph()  # "(Imagen adjunta)"
+
+    linea = doc.add_paragraph('\n\n\n' + ('_' * 40))
+    linea.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    firma = doc.add_paragraph('Firma y Sello del Responsable')
+    firma.alignment = WD_ALIGN_PARAGRAPH.CENTER
+
+    return doc, i_detalle, i_evidencia
+
+
+def renderizar_informe(datos):
+    plantilla, i_detalle, i_evidencia = _plantilla()
+    # deepcopy copia el paquete completo; se pide un proxy nuevo al part porque Document
+    # guarda en caché el <w:body> de la plantilla y apuntaría a una copia huérfana
+    doc = copy.deepcopy(plantilla).part.document
+
+    valores = [
+        datos['id'], datos['fecha'], datos['categoria'],
+        f"Nivel {datos['prioridad']}", datos['asunto'], datos['estado'],
+    ]
+    for row, value in zip(doc.tables[0].rows, valores):
+        row.cells[1].text = str(value)
+
+    parrafos = doc.paragraphs
+    parrafos[i_detalle].text = datos['descripcion']
+
+    evidencia = parrafos[i_evidencia]
+    if datos.get('imagen_error'):
+        evidencia.text = f"[Error cargando imagen: {datos['imagen_error']}]"
+    elif datos['imagen']:
+        try:
+            evidencia.add_run().add_picture(datos['imagen'], width=Inches(4))
+            parrafos[i_evidencia + 1].text = '(Imagen adjunta)'
+        except Exception as e:
+            evidencia.text = f"[Error cargando imagen: {e}]"
+    else:
+        evidencia.text = 'Sin evidencia fotográfica.'
+
+    salida = BytesIO()
+    doc.save(salida)
+    return salida.getvalue()
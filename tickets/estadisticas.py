@@ -0,0 +1,84 @@
+from collections import defaultdict
+
+from django.db import connection
+from django.db.models import Aggregate, Count, DurationField, Exists, ExpressionWrapper, F, OuterRef
+
+from .models import Ticket, TicketEvento
+
+
+class Percentil(Aggregate):
+    # Solo PostgreSQL; en SQLite se calcula en Python sobre la misma consulta
+    function = 'PERCENTILE_CONT'
+    name = 'Percentil'
+    template = '%(function)s(%(fraccion)s) WITHIN GROUP (ORDER BY %(expressions)s)'
+
+    def __init__(self, expression, fraccion, **extra):
+        super().__init__(expression, fraccion=float(fraccion), output_field=DurationField(), **extra)
+
+
+def resoluciones():
+    """Primera resolución de cada ticket, con el tiempo desde su creación en `duracion`."""
+    resuelto_antes = TicketEvento.objects.filter(
+        ticket=OuterRef('ticket'), estado_nuevo=Ticket.Estado.RESUELTO, fecha__lt=OuterRef('fecha'),
+    )
+    return (
+        TicketEvento.objects.filter(estado_nuevo=Ticket.Estado.RESUELTO)
+        .exclude(Exists(resuelto_antes))
+        .annotate(duracion=ExpressionWrapper(F('fecha') - F('ticket__fecha_creacion'), output_field=DurationField()))
+    )
+
+
+def _percentil_python(ordenados, fraccion):
+    # Interpolación lineal, igual que PERCENTILE_CONT
+    posicion = (len(ordenados) - 1) * fraccion
+    inferior = int(posicion)
+    superior = min(inferior + 1, len(ordenados) - 1)
+    return ordenados[inferior] + (ordenados[superior] - ordenados[inferior]) * (posicion - inferior)
+
+
+def tiempos_resolucion_por_categoria(eventos=None, fracciones=(0.5,)):
+    """{categoria_id: {'resueltos': n, 0.5: timedelta, ...}} en una sola consulta agrupada."""
+    eventos = resoluciones() if eventos is None else eventos
+    if connection.vendor == 'postgresql':
+        percentiles = {f"p{i}": Percentil('duracion', fraccion) for i, fraccion in enumerate(fracciones)}
+        filas = eventos.values('ticket__categoria_id').annotate(resueltos=Count('id'), **percentiles).order_by()
+        return {
+            f['ticket__categoria_id']: {
+                'resueltos': f['resueltos'],
+                **{fraccion: f[f"p{i}"] for i, fraccion in enumerate(fracciones)},
+            }
+            for f in filas
+        }
+
+    duraciones = defaultdict(list)
+    for categoria_id, duracion in eventos.values_list('ticket__categoria_id', 'duracion').order_by():
+        duraciones[categoria_id].append(duracion)
+    resultado = {}
+    for categoria_id, valores in duraciones.items():
+        valores.sort()
+        resultado[categoria_id] = {
+            'resueltos': len(valores),
+            **{fraccion: _percentil_python(valores, fraccion) for fraccion in fracciones},
+        }
+    return resultado
+
+
+def mediana_resolucion_por_categoria(eventos=None):
+    """{categoria_id: (mediana timedelta, tickets resueltos)} en una sola consulta agrupada."""
+    return {
+        categoria_id: (datos[0.5], datos['resueltos'])
+        for categoria_id, datos in tiempos_resolucion_por_categoria(eventos).items()
+    }
+
+
+def formatear_duracion(duracion):
+    if duracion is None:
+        return "—"
+    minutos = int(duracion.total_seconds() // 60)
+    dias, minutos = divmod(minutos, 60 * 24)
+    horas, minutos = divmod(minutos, 60)
+    if dias:
+        return f"{dias} d {horas} h"
+    if horas:
+        return f"{horas} h {minutos} min"
+    return f"{minutos} min"
@@ -0,0 +1,135 @@
+import hashlib
+import os
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+
+def _extension(formato):
+    return {'WEBP': 'webp', 'JPEG': 'jpg', 'PNG': 'png'}.get(formato, formato.lower())
+
+
+def _abrir(archivo, lado_objetivo):
+    archivo.seek(0)
+    imagen = Image.open(archivo)
+    # En JPEG el decodificador puede reducir 1/2, 1/4 u 1/8 al leer: evita decodificar 12MP para una miniatura
+    imagen.draft('RGB', (lado_objetivo, lado_objetivo))
+    # Aplica la rotación de la cámara antes de descartar el EXIF
+    return ImageOps.exif_transpose(imagen)
+
+
+def _codificar(imagen, formato, calidad, max_bytes=None):
+    if formato == 'JPEG' and imagen.mode not in ('RGB', 'L'):
+        imagen = imagen.convert('RGB')
+    elif imagen.mode not in ('RGB', 'RGBA', 'L'):
+        imagen = imagen.convert('RGBA' if 'transparency' in imagen.info else 'RGB')
+
+    while True:
+        salida = BytesIO()
+        # Sin exif=... Pillow no copia metadatos (GPS, modelo del teléfono, fecha)
+        imagen.save(salida, formato, quality=calidad, optimize=True)
+        if not max_bytes or salida.tell() <= max_bytes or calidad <= 40:
+            return salida.getvalue()
+        calidad -= 15
+
+
+def _nombre_derivado(nombre, sufijo, formato):
+    base = os.path.splitext(os.path.basename(nombre))[0]
+    return f"{base}{sufijo}.{_extension(formato)}"
+
+
+def _versiones(imagen, nombre, formato):
+    lado_miniatura = settings.MINIATURA_LADO
+    lado_media = settings.VISTA_MEDIA_LADO
+
+    recorte = ImageOps.fit(imagen, (lado_miniatura, lado_miniatura), Image.LANCZOS)
+    media = imagen.copy()
+    media.thumbnail((lado_media, lado_media), Image.LANCZOS)
+    return {
+        'miniatura': ContentFile(
+            _codificar(recorte, formato, settings.MINIATURA_CALIDAD),
+            name=_nombre_derivado(nombre, '_mini', formato),
+        ),
+        'media': ContentFile(
+            _codificar(media, formato, settings.EVIDENCIA_CALIDAD),
+            name=_nombre_derivado(nombre, '_media', formato),
+        ),
+    }
+
+
+def procesar_evidencia(archivo):
+    """Normaliza una foto subida: sin EXIF, lado máximo acotado y re-codificada.
+    Devuelve (ContentFile de la evidencia, {'miniatura': ContentFile, 'media': ContentFile})."""
+    formato = settings.EVIDENCIA_FORMATO
+    max_lado = settings.EVIDENCIA_MAX_LADO
+
+    imagen = _abrir(archivo, max_lado)
+    imagen.thumbnail((max_lado, max_lado), Image.LANCZOS)
+    evidencia = ContentFile(
+        _codificar(imagen, formato, settings.EVIDENCIA_CALIDAD, settings.EVIDENCIA_MAX_BYTES),
+        name=_nombre_derivado(archivo.name, '', formato),
+    )
+    return evidencia, _versiones(imagen, archivo.name, formato)
+
+
+def generar_versiones(archivo):
+    """Miniatura y versión media a partir de una evidencia ya guardada (p.ej. subidas antiguas)."""
+    formato = settings.EVIDENCIA_FORMATO
+    imagen = _abrir(archivo, settings.VISTA_MEDIA_LADO)
+    return _versiones(imagen, archivo.name, formato)
+
+
+def _directorio_cache():
+    directorio = settings.INFORMES_CACHE_DIR or os.path.join(tempfile.gettempdir(), 'buzon_emi_informes')
+    os.makedirs(directorio, exist_ok=True)
+    return directorio
+
+
+def _podar_cache(directorio, max_bytes, conservar):
+    # LRU por fecha de modificación: cada acierto hace "touch" al archivo
+    archivos = []
+    for entrada in os.scandir(directorio):
+        if entrada.is_file() and entrada.name.endswith('.jpg'):
+            estado = entrada.stat()
+            archivos.append((estado.st_mtime, estado.st_size, entrada.path))
+    total = sum(tamano for _, tamano, _ in archivos)
+    for _, tamano, ruta in sorted(archivos):
+        if total <= max_bytes:
+            break
+        if ruta == conservar:
+            continue
+        try:
+            os.remove(ruta)
+            total -= tamano
+        except FileNotFoundError:
+            pass
+
+
+def imagen_para_informe(archivo):
+    """Ruta local a una versión JPEG de la evidencia, del tamaño que usa el informe Word.
+    Lee a través del storage configurado (disco o Cloudinary) y guarda el resultado en un
+    caché LRU en disco, así los informes repetidos o por lote no vuelven a descargar el original."""
+    lado = settings.INFORME_IMAGEN_LADO
+    clave = hashlib.sha1(f"{archivo.storage.__class__.__name__}:{archivo.name}:{lado}".encode()).hexdigest()
+    directorio = _directorio_cache()
+    ruta = os.path.join(directorio, f"{clave}.jpg")
+
+    if os.path.exists(ruta):
+        os.utime(ruta)
+        return ruta
+
+    with archivo.open('rb') as original:
+        imagen = _abrir(original, lado)
+        imagen.thumbnail((lado, lado), Image.LANCZOS)
+        # Word no admite WebP: el informe siempre recibe JPEG
+        contenido = _codificar(imagen, 'JPEG', settings.EVIDENCIA_CALIDAD)
+
+    with tempfile.NamedTemporaryFile(dir=directorio, suffix='.tmp', delete=False) as temporal:
+        temporal.write(contenido)
+    os.replace(temporal.name, ruta)
+
+    _podar_cache(directorio, settings.INFORMES_CACHE_MAX_MB * 1024 * 1024, conservar=ruta)
+    return ruta
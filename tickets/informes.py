@@ -0,0 +1,133 @@
+import logging
+import multiprocessing
+import tempfile
+import threading
+import uuid
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .documentos import datos_de_ticket, nombre_informe, renderizar_informe
+from .imagenes import imagen_para_informe
+from .models import InformeLote, Ticket
+
+logger = logging.getLogger(__name__)
+
+
+def _datos(ticket):
+    # La versión media (si existe) pesa menos que el original y alcanza para 4 pulgadas
+    origen = ticket.imagen_media or ticket.imagen
+    if not origen:
+        return datos_de_ticket(ticket)
+    try:
+        return datos_de_ticket(ticket, imagen_para_informe(origen))
+    except Exception as e:
+        logger.exception("Error obteniendo la evidencia del ticket %s", ticket.id)
+        return datos_de_ticket(ticket, imagen_error=str(e))
+
+
+def informe_individual(ticket):
+    datos = _datos(ticket)
+    return nombre_informe(datos), renderizar_informe(datos)
+
+
+def crear_lote(queryset, usuario=None):
+    ids = [str(pk) for pk in queryset.order_by('fecha_creacion').values_list('pk', flat=True)]
+    lote = InformeLote.objects.create(tickets=ids, total=len(ids), solicitado_por=usuario)
+    if settings.INFORMES_EN_SEGUNDO_PLANO:
+        # Si no hay hilo (p.ej. funciones serverless), lo toma de la cola el cron de
+        # /tareas/procesar-informes/ o el comando procesar_informes
+        transaction.on_commit(lambda: lanzar_en_hilo(lote.pk))
+    return lote
+
+
+def lanzar_en_hilo(lote_id):
+    threading.Thread(target=_procesar_en_hilo, args=(lote_id,), daemon=True).start()
+
+
+def _procesar_en_hilo(lote_id):
+    try:
+        procesar_lote(lote_id)
+    finally:
+        connection.close()
+
+
+def reencolar_abandonados():
+    limite = timezone.now() - timedelta(minutes=settings.INFORMES_TIMEOUT_MINUTOS)
+    return InformeLote.objects.filter(
+        estado=InformeLote.Estado.PROCESANDO, fecha_inicio__lt=limite
+    ).update(estado=InformeLote.Estado.PENDIENTE, procesados=0)
+
+
+def procesar_lote(lote_id):
+    """Genera el ZIP de un lote en cola. Devuelve False si otro proceso ya lo tomó o si falló."""
+    tomado = InformeLote.objects.filter(pk=lote_id, estado=InformeLote.Estado.PENDIENTE).update(
+        estado=InformeLote.Estado.PROCESANDO, fecha_inicio=timezone.now()
+    )
+    if not tomado:
+        return False
+
+    lote = InformeLote.objects.get(pk=lote_id)
+    try:
+        _generar_zip(lote)
+    except Exception as e:
+        logger.exception("Error generando el lote %s", lote_id)
+        InformeLote.objects.filter(pk=lote_id).update(
+            estado=InformeLote.Estado.ERROR, error=str(e), fecha_fin=timezone.now()
+        )
+        return False
+    return True
+
+
+def procesar_cola(maximo=None):
+    """Reencola los lotes abandonados y genera los pendientes, los más antiguos primero (hasta
+    `maximo`). Devuelve (reencolados, [(lote_id, listo), ...])."""
+    reencolados = reencolar_abandonados()
+    pendientes = InformeLote.objects.filter(estado=InformeLote.Estado.PENDIENTE).order_by('fecha_creacion')
+    ids = list(pendientes.values_list('pk', flat=True)[:maximo])
+    return reencolados, [(lote_id, procesar_lote(lote_id)) for lote_id in ids]
+
+
+def _renderizados(lote):
+    tickets = Ticket.objects.filter(pk__in=lote.tickets).select_related('categoria').order_by('fecha_creacion')
+    datos = [_datos(ticket) for ticket in tickets.iterator(chunk_size=500)]
+
+    trabajadores = settings.INFORMES_TRABAJADORES
+    if trabajadores > 1 and len(datos) > 1:
+        # python-docx es CPU puro: procesos, no hilos. "spawn" evita heredar el estado del servidor.
+        try:
+            pool = ProcessPoolExecutor(max_workers=trabajadores, mp_context=multiprocessing.get_context('spawn'))
+            resultados = pool.map(renderizar_informe, datos, chunksize=4)
+        except (OSError, NotImplementedError):
+            # Sin semáforos ni fork (p.ej. funciones serverless): se renderiza en este proceso
+            logger.warning("No se pudo iniciar el pool de procesos, el lote se genera en serie", exc_info=True)
+        else:
+            with pool:
+                yield from zip(datos, resultados)
+            return
+    for item in datos:
+        yield item, renderizar_informe(item)
+
+
+def _generar_zip(lote):
+    procesados = 0
+    with tempfile.TemporaryFile() as temporal:
+        with zipfile.ZipFile(temporal, 'w', zipfile.ZIP_DEFLATED) as comprimido:
+            for procesados, (datos, contenido) in enumerate(_renderizados(lote), start=1):
+                comprimido.writestr(f"{procesados:04d}_{nombre_informe(datos)}", contenido)
+                if procesados % 10 == 0:
+                    InformeLote.objects.filter(pk=lote.pk).update(procesados=procesados)
+        temporal.seek(0)
+        lote.archivo.save(f"lote_{lote.pk}_{uuid.uuid4().hex}.zip", File(temporal), save=False)
+
+    InformeLote.objects.filter(pk=lote.pk).update(
+        estado=InformeLote.Estado.LISTO,
+        archivo=lote.archivo.name,
+        procesados=procesados,
+        fecha_fin=timezone.now(),
+    )
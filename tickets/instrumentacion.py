@@ -0,0 +1,160 @@
+import statistics
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.mail import EmailMessage
+from django.db import connection
+from django.http import JsonResponse
+from django.template.backends.django import Template
+
+# Métricas por request sin debug toolbar: consultas SQL y tiempo de BD (execute_wrapper),
+# render de plantillas y envío de correo (envolturas instaladas una vez en TicketsConfig.ready).
+# Se publican en la cabecera Server-Timing y en un histograma en memoria por vista.
+
+LIMITES_MS = [10, 25, 50, 100, 250, 500, 1000, 2500]
+METODOS = {'GET', 'POST', 'HEAD'}
+CLAVE_DESBORDE = 'OTHER otras'
+_medicion = ContextVar('tickets_medicion', default=None)
+_muestras = {}
+_candado = threading.Lock()
+
+
+class Medicion:
+    def __init__(self):
+        self.consultas = 0
+        self.tiempos = {'db': 0.0, 'plantillas': 0.0, 'correo': 0.0}
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.consultas += 1
+            self.tiempos['db'] += time.perf_counter() - inicio
+
+
+@contextmanager
+def medir(clave):
+    """Suma el tiempo del bloque a la medición del request en curso (si la hay)."""
+    medicion = _medicion.get()
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        if medicion is not None:
+            medicion.tiempos[clave] += time.perf_counter() - inicio
+
+
+def _envolver(clase, metodo, clave):
+    original = getattr(clase, metodo)
+    if getattr(original, '_instrumentado', False):
+        return
+
+    def envuelto(*args, **kwargs):
+        with medir(clave):
+            return original(*args, **kwargs)
+
+    envuelto._instrumentado = True
+    setattr(clase, metodo, envuelto)
+
+
+def instalar():
+    _envolver(Template, 'render', 'plantillas')
+    _envolver(EmailMessage, 'send', 'correo')
+
+
+def registrar(vista, total, medicion):
+    fila = (total * 1000, medicion.tiempos['db'] * 1000, medicion.consultas)
+    with _candado:
+        if vista not in _muestras:
+            # Tope de claves: pasado INSTRUMENTACION_MAX_VISTAS todo lo nuevo se junta en una sola
+            if len(_muestras) >= settings.INSTRUMENTACION_MAX_VISTAS:
+                vista = CLAVE_DESBORDE
+            _muestras.setdefault(vista, deque(maxlen=settings.INSTRUMENTACION_MUESTRAS))
+        _muestras[vista].append(fila)
+
+
+def _percentil(ordenados, p):
+    if len(ordenados) == 1:
+        return ordenados[0]
+    return statistics.quantiles(ordenados, n=100, method='inclusive')[p - 1]
+
+
+def resumen():
+    with _candado:
+        copia = {vista: list(filas) for vista, filas in _muestras.items()}
+    datos = {}
+    for vista, filas in sorted(copia.items()):
+        totales = sorted(f[0] for f in filas)
+        cubetas = {f"<={limite}ms": 0 for limite in LIMITES_MS}
+        cubetas['>2500ms'] = 0
+        for ms in totales:
+            limite = next((l for l in LIMITES_MS if ms <= l), None)
+            cubetas[f"<={limite}ms" if limite else '>2500ms'] += 1
+        datos[vista] = {
+            'muestras': len(filas),
+            'p50_ms': round(_percentil(totales, 50), 2),
+            'p95_ms': round(_percentil(totales, 95), 2),
+            'p99_ms': round(_percentil(totales, 99), 2),
+            'db_ms_promedio': round(statistics.mean(f[1] for f in filas), 2),
+            'consultas_promedio': round(statistics.mean(f[2] for f in filas), 1),
+            'consultas_max': max(f[2] for f in filas),
+            'histograma': cubetas,
+        }
+    return datos
+
+
+def reiniciar():
+    with _candado:
+        _muestras.clear()
+
+
+def vista_metricas(request):
+    if request.method == 'POST':
+        reiniciar()
+    return JsonResponse(resumen(), json_dumps_params={'indent': 2})
+
+
+def _mostrar_cabecera(request):
+    # Consultas y tiempos de BD no se publican a visitantes anónimos: solo con la opción activa o a staff
+    if settings.INSTRUMENTACION_CABECERA:
+        return True
+    usuario = getattr(request, 'user', None)
+    return bool(usuario and usuario.is_staff)
+
+
+class InstrumentacionMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.INSTRUMENTACION_ACTIVA:
+            return self.get_response(request)
+
+        medicion = Medicion()
+        token = _medicion.set(medicion)
+        inicio = time.perf_counter()
+        try:
+            with connection.execute_wrapper(medicion):
+                response = self.get_response(request)
+        finally:
+            _medicion.reset(token)
+        total = time.perf_counter() - inicio
+
+        if _mostrar_cabecera(request):
+            response['Server-Timing'] = ', '.join([
+                f'db;dur={medicion.tiempos["db"] * 1000:.1f};desc="{medicion.consultas} consultas"',
+                f'tpl;dur={medicion.tiempos["plantillas"] * 1000:.1f}',
+                f'correo;dur={medicion.tiempos["correo"] * 1000:.1f}',
+                f'total;dur={total * 1000:.1f}',
+            ])
+        coincidencia = getattr(request, 'resolver_match', None)
+        vista = coincidencia.view_name if coincidencia else 'sin_ruta'
+        # El método lo elige el cliente: cualquier otro que GET/POST/HEAD cuenta como OTHER
+        metodo = request.method if request.method in METODOS else 'OTHER'
+        registrar(f"{metodo} {vista}", total, medicion)
+        return response
@@ -0,0 +1,85 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from django.db.models import Count, Q
+from django.utils import timezone
+
+# Token bucket guardado en el alias de cache "limites". Cada regla de settings.LIMITES_TASA define
+# "capacidad" (ráfaga máxima) y "por_minuto" (fichas que se recargan por minuto). Fichas y última
+# recarga van en una sola clave, y la lectura + escritura se hace con un candado tomado con
+# cache.add (atómico en Redis, Memcached, LocMem y DatabaseCache).
+
+ESPERA_CANDADO = 0.01
+INTENTOS_CANDADO = 20
+
+
+def consumir(nombre, identificador, costo=1):
+    """Intenta gastar `costo` fichas del bucket (nombre, identificador). Devuelve False si no alcanza."""
+    regla = settings.LIMITES_TASA[nombre]
+    capacidad = regla['capacidad']
+    recarga = regla['por_minuto'] / 60.0
+    clave = f"limite:{nombre}:{identificador}"
+    cache = caches['limites']
+
+    # El candado vence solo por si el proceso que lo tiene muere; sin candado se niega (es un límite)
+    for _ in range(INTENTOS_CANDADO):
+        if cache.add(f"{clave}:candado", 1, 2):
+            break
+        time.sleep(ESPERA_CANDADO)
+    else:
+        return False
+
+    try:
+        ahora = time.time()
+        fichas, ultimo = cache.get(clave, (capacidad, ahora))
+        fichas = min(capacidad, fichas + (ahora - ultimo) * recarga)
+        permitido = fichas >= costo
+        if permitido:
+            fichas -= costo
+        # El bucket se olvida solo cuando ya estaría lleno otra vez
+        expira = int((capacidad - fichas) / recarga) + 1 if recarga else None
+        cache.set(clave, (fichas, ahora), expira)
+    finally:
+        cache.delete(f"{clave}:candado")
+    return permitido
+
+
+def ip_cliente(request):
+    """IP del cliente según settings.PROXIES_CONFIABLES: cada proxy agrega una entrada al final de
+    X-Forwarded-For, y lo que está antes lo escribe el propio cliente."""
+    proxies = settings.PROXIES_CONFIABLES
+    remota = request.META.get('REMOTE_ADDR', '')
+    if not proxies:
+        return remota
+    entradas = [e.strip() for e in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if e.strip()]
+    return entradas[-proxies] if len(entradas) >= proxies else remota
+
+
+def bloquear_reportante(usuario_hash):
+    """Serializa, hasta el fin de la transacción en curso, las quejas de un mismo reportante: así el
+    conteo de quejas_excedidas() y el INSERT siguiente no se intercalan con otro envío paralelo.
+    PostgreSQL usa un advisory lock por usuario_hash; SQLite ya serializa las escrituras con
+    BEGIN IMMEDIATE (ver DATABASES en settings)."""
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_xact_lock(%s)', [int(usuario_hash[:15], 16)])
+
+
+def quejas_excedidas(usuario_hash):
+    """True si el reportante ya llegó al máximo en alguna ventana. Una sola consulta sobre el
+    índice (usuario_hash, fecha_creacion), contando todas las ventanas a la vez."""
+    from .models import Ticket
+
+    ventanas = settings.LIMITES_QUEJAS
+    ahora = timezone.now()
+    desde = {minutos: ahora - timedelta(minutes=minutos) for minutos, _ in ventanas}
+    conteos = Ticket.objects.filter(
+        usuario_hash=usuario_hash, fecha_creacion__gte=min(desde.values())
+    ).aggregate(**{
+        f"ultimos_{minutos}": Count('pk', filter=Q(fecha_creacion__gte=inicio))
+        for minutos, inicio in desde.items()
+    })
+    return any(conteos[f"ultimos_{minutos}"] >= maximo for minutos, maximo in ventanas)
@@ -0,0 +1,76 @@
+import time
+import tracemalloc
+from io import BytesIO
+
+from django.core.management.base import BaseCommand
+from docx import Document
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+from PIL import Image
+
+from tickets.documentos import ETIQUETAS, renderizar_informe
+
+
+def renderizar_desde_cero(datos):
+    # Camino anterior: Document() y toda la estructura armada en cada informe
+    doc = Document()
+    doc.add_heading('ESCUELA MILITAR DE INGENIERÍA', 0).alignment = WD_ALIGN_PARAGRAPH.CENTER
+    doc.add_paragraph('REPORTE DE INCIDENTE / SUGERENCIA').alignment = WD_ALIGN_PARAGRAPH.CENTER
+    doc.add_paragraph('_' * 70)
+    table = doc.add_table(rows=6, cols=2)
+    table.style = 'Table Grid'
+    valores = [datos['id'], datos['fecha'], datos['categoria'], f"Nivel {datos['prioridad']}", datos['asunto'], datos['estado']]
+    for row, label, value in zip(table.rows, ETIQUETAS, valores):
+        row.cells[0].text = label
+        row.cells[0].paragraphs[0].runs[0].font.bold = True
+        row.cells[1].text = str(value)
+    doc.add_heading('Detalle:', level=2)
+    doc.add_paragraph(datos['descripcion']).alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
+    doc.add_heading('Evidencia:', level=2)
+    if datos['imagen']:
+        doc.add_picture(datos['imagen'])
+        doc.add_paragraph('(Imagen adjunta)')
+    else:
+        doc.add_paragraph('Sin evidencia fotográfica.')
+    doc.add_paragraph('\n\n\n' + ('_' * 40)).alignment = WD_ALIGN_PARAGRAPH.CENTER
+    doc.add_paragraph('Firma y Sello del Responsable').alignment = WD_ALIGN_PARAGRAPH.CENTER
+    salida = BytesIO()
+    doc.save(salida)
+    return salida.getvalue()
+
+
+class Command(BaseCommand):
+    help = "Compara tiempo y memoria por informe: plantilla en caché vs Document() desde cero."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeticiones', type=int, default=50)
+
+    def _medir(self, funcion, datos, repeticiones):
+        funcion(datos)  # calentamiento (y construcción de la plantilla)
+        inicio = time.perf_counter()
+        for _ in range(repeticiones):
+            funcion(datos)
+        ms = (time.perf_counter() - inicio) / repeticiones * 1000
+
+        tracemalloc.start()
+        funcion(datos)
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return ms, pico / 1024
+
+    def handle(self, *args, **options):
+        imagen = BytesIO()
+        Image.new('RGB', (800, 600), (0, 51, 102)).save(imagen, 'JPEG')
+        base = {
+            'id': '7f1c2e9a-0000-4000-8000-000000000000', 'fecha': '18/10/2026 10:00',
+            'categoria': 'Infraestructura', 'prioridad': 2, 'asunto': 'Proyector dañado',
+            'estado': 'Pendiente', 'descripcion': 'El proyector del aula B-102 no enciende. ' * 20,
+        }
+        casos = {'sin imagen': dict(base, imagen=None), 'con imagen': dict(base, imagen=imagen)}
+
+        for caso, datos in casos.items():
+            self.stdout.write(self.style.MIGRATE_HEADING(f"Informe {caso}:"))
+            for nombre, funcion in (('Document() desde cero', renderizar_desde_cero), ('plantilla en caché', renderizar_informe)):
+                if datos['imagen']:
+                    datos['imagen'].seek(0)
+                ms, pico_kb = self._medir(funcion, datos, options['repeticiones'])
+                self.stdout.write(f"  {nombre:<24} {ms:7.2f} ms/informe  pico de memoria {pico_kb:8.0f} KiB")
@@ -0,0 +1,47 @@
+import random
+import string
+import time
+
+from django.core.management.base import BaseCommand
+
+from tickets.deteccion import MotorPalabras, PALABRAS_CLAVE, SPAM
+
+
+def _palabra_aleatoria(rng):
+    return ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 9)))
+
+
+def _medir(motor, texto, repeticiones):
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        motor.buscar(texto)
+    return (time.perf_counter() - inicio) / repeticiones * 1e6
+
+
+class Command(BaseCommand):
+    help = "Microbenchmark del motor de palabras: el costo crece con el texto, no con las listas."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeticiones', type=int, default=50)
+        parser.add_argument('--semilla', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['semilla'])
+        repeticiones = options['repeticiones']
+        base = {'alertas': PALABRAS_CLAVE, 'spam': SPAM}
+
+        self.stdout.write("Largo del texto (listas actuales):")
+        motor = MotorPalabras(base)
+        for palabras in (50, 500, 5000):
+            texto = ' '.join(_palabra_aleatoria(rng) for _ in range(palabras))
+            us = _medir(motor, texto, repeticiones)
+            self.stdout.write(f"  {len(texto):>7} chars  {us:>10.1f} us/texto")
+
+        self.stdout.write("Tamaño de las listas (texto fijo de 500 palabras):")
+        texto = ' '.join(_palabra_aleatoria(rng) for _ in range(500))
+        for extra in (0, 1000, 10000):
+            grupos = dict(base, extra=[_palabra_aleatoria(rng) for _ in range(extra)])
+            motor = MotorPalabras(grupos)
+            us = _medir(motor, texto, repeticiones)
+            total = sum(len(v) for v in grupos.values())
+            self.stdout.write(f"  {total:>7} patrones  {us:>10.1f} us/texto")
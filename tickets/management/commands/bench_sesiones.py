@@ -0,0 +1,77 @@
+import re
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from tickets.models import Categoria, CorreoPendiente
+
+MOTORES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+
+SIN_LIMITES = {
+    nombre: {'capacidad': 10 ** 9, 'por_minuto': 10 ** 9}
+    for nombre in ('otp_email', 'otp_ip', 'validar_email', 'validar_ip')
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide el costo por request de solicitar_acceso -> validar_codigo -> crear_queja con cada motor "
+        "de sesión, sobre una base de datos de prueba temporal."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iteraciones', type=int, default=30)
+
+    def _paso(self, metricas, nombre, funcion):
+        with CaptureQueriesContext(connection) as consultas:
+            inicio = time.perf_counter()
+            respuesta = funcion()
+            ms = (time.perf_counter() - inicio) * 1000
+        de_sesion = sum('django_session' in q['sql'] for q in consultas.captured_queries)
+        metricas.setdefault(nombre, []).append((ms, len(consultas), de_sesion))
+        return respuesta
+
+    def _flujo(self, metricas, categoria, i):
+        cliente = Client()
+        email = f"bench{i}@est.emi.edu.bo"
+        self._paso(metricas, 'solicitar_acceso', lambda: cliente.post(reverse('solicitar_acceso'), {'email': email}))
+        codigo = re.search(r'\d{6}', CorreoPendiente.objects.latest('pk').mensaje).group()
+        self._paso(metricas, 'validar_codigo', lambda: cliente.post(reverse('validar_codigo'), {'codigo': codigo}))
+        respuesta = self._paso(metricas, 'crear_queja', lambda: cliente.post(reverse('crear_queja'), {
+            'categoria': categoria.pk, 'asunto': "Bench", 'descripcion': "Medición de sesiones",
+        }))
+        if respuesta.status_code != 302:
+            raise RuntimeError(f"crear_queja respondió {respuesta.status_code}")
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        nombre_bd = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            categoria = Categoria.objects.create(nombre="Bench", email_responsable="bench@emi.edu.bo")
+            self.stdout.write(f"{'motor':<10} {'paso':<18} {'p50 ms':>8} {'consultas':>10} {'de sesión':>10}")
+            for modo, motor in MOTORES.items():
+                metricas = {}
+                ajustes = override_settings(
+                    SESSION_ENGINE=motor, LIMITES_TASA=SIN_LIMITES, LIMITES_QUEJAS=[(1, 10 ** 9)],
+                )
+                with ajustes:
+                    for i in range(options['iteraciones']):
+                        self._flujo(metricas, categoria, f"{modo}{i}")
+                for paso, valores in metricas.items():
+                    ms, total, de_sesion = zip(*valores)
+                    self.stdout.write(
+                        f"{modo:<10} {paso:<18} {statistics.median(ms):8.2f} "
+                        f"{statistics.mean(total):10.1f} {statistics.mean(de_sesion):10.1f}"
+                    )
+        finally:
+            connection.creation.destroy_test_db(nombre_bd, verbosity=0)
+            teardown_test_environment()
@@ -0,0 +1,48 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from tickets.models import Ticket, TicketEvento
+from tickets.transiciones import cambiar_estado
+
+
+def _fecha(valor):
+    try:
+        return timezone.make_aware(datetime.strptime(valor, '%Y-%m-%d'))
+    except ValueError:
+        raise CommandError(f"Fecha inválida '{valor}': usar AAAA-MM-DD")
+
+
+class Command(BaseCommand):
+    help = (
+        "Cambia el estado de muchos tickets por lotes, registrando un TicketEvento por ticket. "
+        "Ej.: cambiar_estado_tickets RES --desde PROC --creados-antes 2025-01-01"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('estado', choices=Ticket.Estado.values)
+        parser.add_argument('--desde', choices=Ticket.Estado.values, help="Solo tickets en este estado.")
+        parser.add_argument('--categoria', type=int, help="ID de la categoría.")
+        parser.add_argument('--creados-antes', type=_fecha, help="AAAA-MM-DD (exclusivo).")
+        parser.add_argument('--lote', type=int, default=None)
+        parser.add_argument('--simular', action='store_true', help="Solo cuenta los tickets afectados.")
+
+    def handle(self, *args, **options):
+        tickets = Ticket.objects.all()
+        if options['desde']:
+            tickets = tickets.filter(estado=options['desde'])
+        if options['categoria']:
+            tickets = tickets.filter(categoria_id=options['categoria'])
+        if options['creados_antes']:
+            tickets = tickets.filter(fecha_creacion__lt=options['creados_antes'])
+
+        if options['simular']:
+            afectados = tickets.exclude(estado=options['estado']).count()
+            self.stdout.write(f"Se cambiarían {afectados} tickets a {options['estado']}.")
+            return
+
+        cambiados = cambiar_estado(
+            tickets, options['estado'], origen=TicketEvento.Origen.COMANDO, lote=options['lote']
+        )
+        self.stdout.write(self.style.SUCCESS(f"Listo: {cambiados} tickets pasaron a {options['estado']}."))
@@ -0,0 +1,34 @@
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.sessions.backends.db import SessionStore as SesionBD
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = (
+        "Borra por lotes las sesiones vencidas de django_session (como clearsessions, sin un DELETE "
+        "gigante que bloquee la tabla). Pensado para ejecutarse periódicamente desde cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        store = import_module(settings.SESSION_ENGINE).SessionStore
+        if not issubclass(store, SesionBD):
+            self.stdout.write(f"{settings.SESSION_ENGINE} no guarda sesiones en la base de datos; nada que compactar.")
+            return
+
+        Session = store.get_model_class()
+        ahora = timezone.now()
+        total = 0
+        while True:
+            claves = list(
+                Session.objects.filter(expire_date__lt=ahora).values_list('session_key', flat=True)[:options['lote']]
+            )
+            if not claves:
+                break
+            total += Session.objects.filter(session_key__in=claves).delete()[0]
+        self.stdout.write(f"Sesiones vencidas eliminadas: {total}")
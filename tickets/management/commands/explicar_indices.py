@@ -0,0 +1,86 @@
+import random
+import time
+import uuid
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from tickets.models import Categoria, Ticket
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Siembra N tickets dentro de una transacción, muestra el plan (EXPLAIN) y el tiempo de "
+        "las consultas del dashboard y del admin, y deshace todo al terminar."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--filas', type=int, default=1_000_000)
+        parser.add_argument('--lote', type=int, default=5000)
+
+    def _sembrar(self, filas, lote):
+        categorias = [
+            Categoria.objects.create(nombre=f"Bench {i}", email_responsable=f"bench{i}@emi.edu.bo")
+            for i in range(8)
+        ]
+        estados = ['PEND', 'PROC', 'RES', 'RES', 'RES', 'RECH']
+        # ~20 quejas por reportante, como el historial que mira el anti-flood
+        reportantes = [f"{i:064x}" for i in range(max(1, filas // 20))]
+        rng = random.Random(0)
+        for inicio in range(0, filas, lote):
+            Ticket.objects.bulk_create([
+                Ticket(
+                    id=uuid.uuid4(), usuario_hash=rng.choice(reportantes), categoria=rng.choice(categorias),
+                    asunto="Bench", descripcion="Bench", estado=rng.choice(estados),
+                )
+                for _ in range(min(lote, filas - inicio))
+            ])
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        return categorias[0], reportantes[0]
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.stdout.write(f"Sembrando {options['filas']} tickets...")
+                categoria, usuario_hash = self._sembrar(options['filas'], options['lote'])
+                consultas = {
+                    'Última actividad pública': (
+                        'ticket_publico_fecha_idx',
+                        Ticket.objects.exclude(estado='RECH').order_by('-fecha_creacion')[:10],
+                    ),
+                    'Anti-flood por reportante': (
+                        'ticket_usuario_fecha_idx',
+                        Ticket.objects.filter(
+                            usuario_hash=usuario_hash, fecha_creacion__gte=timezone.now() - timedelta(days=1)
+                        ),
+                    ),
+                    'Admin: filtro estado': (
+                        'ticket_estado_fecha_idx',
+                        Ticket.objects.filter(estado='PEND').order_by('-fecha_creacion')[:100],
+                    ),
+                    'Admin: categoría + estado': (
+                        'ticket_cat_estado_fecha_idx',
+                        Ticket.objects.filter(categoria=categoria, estado='PROC').order_by('-fecha_creacion')[:100],
+                    ),
+                }
+                for nombre, (indice, queryset) in consultas.items():
+                    inicio = time.perf_counter()
+                    list(queryset)
+                    ms = (time.perf_counter() - inicio) * 1000
+                    plan = queryset.explain()
+                    self.stdout.write(self.style.MIGRATE_HEADING(f"\n{nombre} ({ms:.1f} ms)"))
+                    self.stdout.write(plan)
+                    if indice in plan:
+                        self.stdout.write(self.style.SUCCESS(f"usa {indice}"))
+                    else:
+                        self.stdout.write(self.style.WARNING(f"NO usa {indice}"))
+                raise _Rollback
+        except _Rollback:
+            self.stdout.write("\nDatos de prueba descartados.")
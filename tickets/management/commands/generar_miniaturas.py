@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from tickets.models import Ticket
+
+
+class Command(BaseCommand):
+    help = "Genera la miniatura y la versión media de las evidencias que aún no las tienen."
+
+    def handle(self, *args, **options):
+        sin_version = (
+            Q(imagen_miniatura='') | Q(imagen_miniatura__isnull=True)
+            | Q(imagen_media='') | Q(imagen_media__isnull=True)
+        )
+        pendientes = (
+            Ticket.objects.exclude(imagen='').exclude(imagen__isnull=True)
+            .filter(sin_version)
+            .only('imagen', 'imagen_miniatura', 'imagen_media')
+        )
+        total = 0
+        for ticket in pendientes.iterator(chunk_size=100):
+            ticket.asegurar_versiones()
+            total += 1
+        self.stdout.write(f"Versiones generadas para {total} evidencias.")
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from tickets.correo import procesar_pendientes
+
+
+class Command(BaseCommand):
+    help = (
+        "Envía los correos encolados en CorreoPendiente (una conexión SMTP por lote). En Render u otro "
+        "servidor, programarlo como Cron Job o correrlo como worker con --continuo."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=None, help="Máximo de correos por conexión SMTP")
+        parser.add_argument('--continuo', action='store_true', help="Seguir procesando la cola indefinidamente")
+        parser.add_argument('--intervalo', type=float, default=5, help="Segundos de espera cuando la cola está vacía")
+
+    def handle(self, *args, **options):
+        while True:
+            enviados, fallidos = procesar_pendientes(options['lote'])
+            if enviados or fallidos:
+                self.stdout.write(f"Enviados: {enviados} | Fallidos: {fallidos}")
+            if not options['continuo']:
+                break
+            if not (enviados or fallidos):
+                time.sleep(options['intervalo'])
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from tickets.informes import procesar_cola
+
+
+class Command(BaseCommand):
+    help = "Genera los informes Word por lote que están en cola (y reintenta los abandonados)."
+
+    def handle(self, *args, **options):
+        reencolados, resultados = procesar_cola()
+        if reencolados:
+            self.stdout.write(self.style.WARNING(f"Lotes abandonados reencolados: {reencolados}"))
+        for lote_id, listo in resultados:
+            if listo:
+                self.stdout.write(self.style.SUCCESS(f"Lote #{lote_id} listo."))
+            else:
+                self.stdout.write(self.style.ERROR(f"Lote #{lote_id} no se pudo generar."))
@@ -0,0 +1,257 @@
+import http.cookiejar
+import re
+import statistics
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.staticfiles.handlers import StaticFilesHandler
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection, connections
+from django.test.testcases import LiveServerThread
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from PIL import Image
+
+from tickets.correo import procesar_pendientes
+from tickets.models import Categoria, CorreoPendiente, Ticket
+from tickets.transparencia import reconciliar
+
+SIN_LIMITES = {
+    nombre: {'capacidad': 10 ** 9, 'por_minuto': 10 ** 9}
+    for nombre in ('otp_email', 'otp_ip', 'validar_email', 'validar_ip')
+}
+
+ESTADOS = ['PEND', 'PROC', 'RES', 'RES', 'RECH']
+
+
+class _SinRedirecciones(urllib.request.HTTPRedirectHandler):
+    # Cada paso se mide solo: el 302 es la respuesta esperada, no se sigue
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+def _foto():
+    salida = BytesIO()
+    Image.new('RGB', (1600, 1200), (90, 140, 200)).save(salida, 'JPEG', quality=90)
+    return salida.getvalue()
+
+
+def _multipart(campos, archivos):
+    limite = uuid.uuid4().hex
+    partes = []
+    for nombre, valor in campos.items():
+        partes.append(
+            f'--{limite}\r\nContent-Disposition: form-data; name="{nombre}"\r\n\r\n{valor}\r\n'.encode()
+        )
+    for nombre, (archivo, contenido, tipo) in archivos.items():
+        partes.append(
+            f'--{limite}\r\nContent-Disposition: form-data; name="{nombre}"; filename="{archivo}"\r\n'
+            f'Content-Type: {tipo}\r\n\r\n'.encode() + contenido + b'\r\n'
+        )
+    partes.append(f'--{limite}--\r\n'.encode())
+    return b''.join(partes), f'multipart/form-data; boundary={limite}'
+
+
+class _Estudiante:
+    """Un navegador: cookies propias y token CSRF tomado de la cookie."""
+
+    def __init__(self, base, metricas, candado):
+        self.base = base
+        self.metricas = metricas
+        self.candado = candado
+        self.cookies = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(self.cookies), _SinRedirecciones()
+        )
+
+    def _csrf(self):
+        return next((c.value for c in self.cookies if c.name == settings.CSRF_COOKIE_NAME), '')
+
+    def pedir(self, paso, ruta, datos=None, archivos=None, esperado=200):
+        url = self.base + ruta
+        cabeceras = {'Referer': url}
+        cuerpo = None
+        if datos is not None:
+            cabeceras['X-CSRFToken'] = self._csrf()
+            if archivos:
+                cuerpo, cabeceras['Content-Type'] = _multipart(datos, archivos)
+            else:
+                cuerpo = urllib.parse.urlencode(datos).encode()
+                cabeceras['Content-Type'] = 'application/x-www-form-urlencoded'
+
+        inicio = time.perf_counter()
+        try:
+            with self.opener.open(urllib.request.Request(url, cuerpo, cabeceras), timeout=30) as respuesta:
+                respuesta.read()
+                codigo = respuesta.status
+        except urllib.error.HTTPError as e:
+            codigo = e.code
+        except OSError:
+            codigo = 0
+        ms = (time.perf_counter() - inicio) * 1000
+
+        with self.candado:
+            self.metricas.setdefault(paso, []).append((ms, codigo == esperado))
+        return codigo == esperado
+
+
+def _codigo_para(email, intentos=50):
+    # El código sale de la cola de correo (misma base de datos que el servidor)
+    for _ in range(intentos):
+        correo = CorreoPendiente.objects.filter(destinatarios=email).order_by('-pk').first()
+        if correo:
+            return re.search(r'\d{6}', correo.mensaje).group()
+        time.sleep(0.02)
+    return None
+
+
+def _percentil(ordenados, p):
+    if len(ordenados) == 1:
+        return ordenados[0]
+    return statistics.quantiles(ordenados, n=100, method='inclusive')[p - 1]
+
+
+class Command(BaseCommand):
+    help = (
+        "Prueba de carga del flujo estudiante (solicitar_acceso -> validar_codigo -> crear_queja con y sin "
+        "imagen -> dashboard_publico) contra un servidor HTTP local. Reporta p50/p95/p99 y req/s por paso."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--usuarios', type=int, default=8, help="Estudiantes concurrentes.")
+        parser.add_argument('--iteraciones', type=int, default=10, help="Flujos completos por estudiante.")
+        parser.add_argument('--tickets', type=int, default=2000, help="Tickets sembrados antes de medir.")
+        parser.add_argument(
+            '--url',
+            help="Servidor ya levantado (p.ej. http://127.0.0.1:8000). Debe usar esta misma base de datos "
+                 "y límites de tasa holgados. Sin --url se levanta uno sobre una base de prueba temporal.",
+        )
+
+    def _sembrar(self, cantidad):
+        categorias = [
+            Categoria.objects.create(nombre=f"Carga {i}", email_responsable=f"carga{i}@emi.edu.bo")
+            for i in range(5)
+        ]
+        Ticket.objects.bulk_create(
+            [
+                Ticket(
+                    usuario_hash=f"{i:064x}", categoria=categorias[i % len(categorias)],
+                    asunto=f"Ticket sembrado {i}", descripcion="Proyector dañado en aula", estado=ESTADOS[i % 5],
+                )
+                for i in range(cantidad)
+            ],
+            batch_size=500,
+        )
+        reconciliar()
+        return categorias
+
+    def _flujo(self, base, metricas, candado, categoria, foto, n):
+        estudiante = _Estudiante(base, metricas, candado)
+        email = f"carga{n}.{uuid.uuid4().hex[:8]}@est.emi.edu.bo"
+        estudiante.pedir('GET solicitar_acceso', reverse('solicitar_acceso'))
+        if not estudiante.pedir('POST solicitar_acceso', reverse('solicitar_acceso'), {'email': email}, esperado=302):
+            return
+        codigo = _codigo_para(email)
+        if not codigo or not estudiante.pedir(
+            'POST validar_codigo', reverse('validar_codigo'), {'codigo': codigo}, esperado=302
+        ):
+            return
+        datos = {'categoria': categoria.pk, 'asunto': f"Carga {n}", 'descripcion': "Medición de carga"}
+        if n % 2:
+            archivos = {'imagen': ('evidencia.jpg', foto, 'image/jpeg')}
+            estudiante.pedir('POST crear_queja (imagen)', reverse('crear_queja'), datos, archivos, esperado=302)
+        else:
+            estudiante.pedir('POST crear_queja', reverse('crear_queja'), datos, esperado=302)
+        estudiante.pedir('GET dashboard_publico', reverse('dashboard_publico'))
+
+    def _estudiante(self, base, metricas, candado, categorias, foto, indice, iteraciones):
+        try:
+            for i in range(iteraciones):
+                n = indice * iteraciones + i
+                self._flujo(base, metricas, candado, categorias[n % len(categorias)], foto, n)
+        finally:
+            connections.close_all()
+
+    def _medir(self, base, categorias, options):
+        metricas, candado = {}, threading.Lock()
+        foto = _foto()
+        hilos = [
+            threading.Thread(
+                target=self._estudiante,
+                args=(base, metricas, candado, categorias, foto, i, options['iteraciones']),
+            )
+            for i in range(options['usuarios'])
+        ]
+        inicio = time.perf_counter()
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        return metricas, time.perf_counter() - inicio
+
+    def _reportar(self, metricas, duracion):
+        self.stdout.write(
+            f"{'paso':<28} {'n':>6} {'errores':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>8}"
+        )
+        for paso, valores in metricas.items():
+            ms = sorted(v for v, _ in valores)
+            errores = sum(not ok for _, ok in valores)
+            self.stdout.write(
+                f"{paso:<28} {len(ms):6d} {errores:8d} {_percentil(ms, 50):9.1f} "
+                f"{_percentil(ms, 95):9.1f} {_percentil(ms, 99):9.1f} {len(ms) / duracion:8.1f}"
+            )
+        self.stdout.write(f"Duración total: {duracion:.1f}s")
+
+    def _servidor_local(self):
+        hilo = LiveServerThread('127.0.0.1', StaticFilesHandler)
+        hilo.daemon = True
+        hilo.start()
+        hilo.is_ready.wait()
+        if hilo.error:
+            raise hilo.error
+        return hilo
+
+    def handle(self, *args, **options):
+        if options['url']:
+            categorias = list(Categoria.objects.all()) or self._sembrar(options['tickets'])
+            metricas, duracion = self._medir(options['url'].rstrip('/'), categorias, options)
+            self._reportar(metricas, duracion)
+            return
+
+        setup_test_environment()
+        # SQLite en archivo (no en memoria) para que cada hilo del servidor tenga su propia conexión
+        archivo_bd = tempfile.NamedTemporaryFile(suffix='.sqlite3', delete=False).name
+        if connection.vendor == 'sqlite':
+            connection.settings_dict['TEST']['NAME'] = archivo_bd
+        nombre_bd = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        ajustes = override_settings(
+            EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+            LIMITES_TASA=SIN_LIMITES,
+            LIMITES_QUEJAS=[(1, 10 ** 9)],
+            SESSION_COOKIE_SECURE=False,
+            CSRF_COOKIE_SECURE=False,
+            MEDIA_ROOT=tempfile.mkdtemp(prefix='buzon_carga_'),
+        )
+        try:
+            with ajustes:
+                categorias = self._sembrar(options['tickets'])
+                close_old_connections()
+                servidor = self._servidor_local()
+                try:
+                    metricas, duracion = self._medir(f"http://127.0.0.1:{servidor.port}", categorias, options)
+                finally:
+                    servidor.terminate()
+                    servidor.join()
+                self._reportar(metricas, duracion)
+                enviados, fallidos = procesar_pendientes()
+                self.stdout.write(f"Cola de correo vaciada en locmem: {enviados} enviados, {fallidos} fallidos.")
+        finally:
+            connection.creation.destroy_test_db(nombre_bd, verbosity=0)
+            teardown_test_environment()
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from tickets.transparencia import reconciliar
+
+
+class Command(BaseCommand):
+    help = "Recalcula el DashboardSnapshot desde la tabla de tickets y corrige cualquier desvío."
+
+    def handle(self, *args, **options):
+        diferencias = reconciliar()
+        if not diferencias:
+            self.stdout.write("Snapshot al día, sin desvíos.")
+            return
+        for campo, (antes, despues) in diferencias.items():
+            self.stdout.write(self.style.WARNING(f"{campo}: {antes} -> {despues}"))
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from tickets.estadisticas import formatear_duracion
+from tickets.models import ResumenCategoria
+from tickets.transparencia import resumir_categorias
+
+
+class Command(BaseCommand):
+    help = (
+        "Precalcula el resumen diario por categoría (abiertos, resueltos en 30 días, mediana y p90 de "
+        "resolución) que muestra la página de transparencia. Programarlo una vez al día."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, default=30, help="Ventana para resueltos y tiempos.")
+
+    def handle(self, *args, **options):
+        fecha = resumir_categorias(dias=options['dias'])
+        for fila in ResumenCategoria.objects.filter(fecha=fecha).select_related('categoria'):
+            self.stdout.write(
+                f"{fila.categoria.nombre:<30} abiertos={fila.abiertos:<5} resueltos={fila.resueltos_30d:<5} "
+                f"mediana={formatear_duracion(fila.mediana_resolucion)} p90={formatear_duracion(fila.p90_resolucion)}"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Resumen del {fecha:%d/%m/%Y} guardado."))
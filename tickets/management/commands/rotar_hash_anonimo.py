@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from tickets.anonimato import actualizar_hash, version_actual
+from tickets.models import Ticket
+
+
+class Command(BaseCommand):
+    help = "Aplica las claves nuevas de ANONIMATO_CLAVES a los usuario_hash existentes, por lotes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        version = version_actual()
+        if Ticket.objects.filter(hash_version__gt=version).exists():
+            raise CommandError(
+                "Hay tickets con más capas que claves configuradas: no se puede quitar una clave de ANONIMATO_CLAVES."
+            )
+
+        pendientes = Ticket.objects.filter(hash_version__lt=version).order_by('pk')
+        ultimo = None
+        total = 0
+        while True:
+            lote = pendientes if ultimo is None else pendientes.filter(pk__gt=ultimo)
+            with transaction.atomic():
+                tickets = list(lote.select_for_update().only('pk', 'usuario_hash', 'hash_version')[:options['lote']])
+                if not tickets:
+                    break
+                for ticket in tickets:
+                    ticket.usuario_hash = actualizar_hash(ticket.usuario_hash, ticket.hash_version)
+                    ticket.hash_version = version
+                Ticket.objects.bulk_update(tickets, ['usuario_hash', 'hash_version'])
+            ultimo = tickets[-1].pk
+            total += len(tickets)
+            self.stdout.write(f"  {total} tickets actualizados...")
+
+        self.stdout.write(self.style.SUCCESS(f"Listo: {total} tickets en la versión {version}."))
@@ -0,0 +1,25 @@
+# Generated by Django 6.0.1 on 2026-10-18 13:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0002_correopendiente'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pendientes', models.PositiveIntegerField(default=0)),
+                ('en_proceso', models.PositiveIntegerField(default=0)),
+                ('resueltos', models.PositiveIntegerField(default=0)),
+                ('rechazados', models.PositiveIntegerField(default=0)),
+                ('ultimos', models.JSONField(blank=True, default=list)),
+                ('actualizado', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 6.0.1 on 2026-10-18 13:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0003_dashboardsnapshot'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['estado', '-fecha_creacion'], name='ticket_estado_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['categoria', 'estado', '-fecha_creacion'], name='ticket_cat_estado_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(condition=models.Q(('estado', 'RECH'), _negated=True), fields=['-fecha_creacion'], name='ticket_publico_fecha_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 6.0.1 on 2026-10-18 13:10
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+def instalar_busqueda(apps, schema_editor):
+    from tickets import busqueda
+    busqueda.instalar(schema_editor.connection)
+
+
+def desinstalar_busqueda(apps, schema_editor):
+    from tickets import busqueda
+    busqueda.desinstalar(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0004_indices_ticket'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='busqueda',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(instalar_busqueda, desinstalar_busqueda),
+    ]
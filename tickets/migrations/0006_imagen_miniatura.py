@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-18 13:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0005_busqueda_texto'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='imagen_miniatura',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='evidencias/%Y/%m/'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-18 13:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0006_imagen_miniatura'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='imagen_media',
+            field=models.ImageField(blank=True, editable=False, null=True, upload_to='evidencias/%Y/%m/'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-18 13:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0008_informelote'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='hash_version',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, help_text='Claves aplicadas al usuario_hash (ver tickets/anonimato.py)'),
+        ),
+    ]
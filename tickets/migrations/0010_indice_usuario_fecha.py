@@ -0,0 +1,22 @@
+# Generated by Django 6.0.1 on 2026-10-18 13:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0009_hash_version'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['usuario_hash', '-fecha_creacion'], name='ticket_usuario_fecha_idx'),
+        ),
+        migrations.AlterField(
+            model_name='ticket',
+            name='usuario_hash',
+            field=models.CharField(max_length=64),
+        ),
+    ]
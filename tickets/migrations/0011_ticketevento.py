@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:20
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0010_indice_usuario_fecha'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TicketEvento',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('estado_anterior', models.CharField(choices=[('PEND', 'Pendiente'), ('PROC', 'En Proceso'), ('RES', 'Resuelto'), ('RECH', 'Rechazado/Spam')], max_length=4)),
+                ('estado_nuevo', models.CharField(choices=[('PEND', 'Pendiente'), ('PROC', 'En Proceso'), ('RES', 'Resuelto'), ('RECH', 'Rechazado/Spam')], max_length=4)),
+                ('fecha', models.DateTimeField(default=django.utils.timezone.now)),
+                ('origen', models.CharField(choices=[('ADM', 'Panel de administración'), ('CMD', 'Comando de gestión'), ('SIS', 'Sistema')], default='ADM', max_length=3)),
+                ('ticket', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='eventos', to='tickets.ticket')),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'evento de ticket',
+                'verbose_name_plural': 'eventos de tickets',
+                'indexes': [models.Index(fields=['ticket', 'fecha'], name='evento_ticket_fecha_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0011_ticketevento'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='ticketevento',
+            name='estado_anterior',
+            field=models.CharField(blank=True, choices=[('PEND', 'Pendiente'), ('PROC', 'En Proceso'), ('RES', 'Resuelto'), ('RECH', 'Rechazado/Spam')], max_length=4),
+        ),
+    ]
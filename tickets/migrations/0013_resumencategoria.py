@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0012_evento_creacion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenCategoria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('abiertos', models.PositiveIntegerField(default=0, help_text='Pendientes + en proceso')),
+                ('resueltos_30d', models.PositiveIntegerField(default=0)),
+                ('mediana_resolucion', models.DurationField(blank=True, null=True)),
+                ('p90_resolucion', models.DurationField(blank=True, null=True)),
+                ('actualizado', models.DateTimeField(auto_now=True)),
+                ('categoria', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumenes', to='tickets.categoria')),
+            ],
+            options={
+                'verbose_name': 'resumen por categoría',
+                'verbose_name_plural': 'resúmenes por categoría',
+                'constraints': [models.UniqueConstraint(fields=('fecha', 'categoria'), name='resumen_fecha_categoria_uniq')],
+            },
+        ),
+    ]
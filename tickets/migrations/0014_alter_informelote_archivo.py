@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:34
+
+import tickets.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0013_resumencategoria'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='informelote',
+            name='archivo',
+            field=models.FileField(blank=True, storage=tickets.models.almacenamiento_informes, upload_to='informes/'),
+        ),
+    ]
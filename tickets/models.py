@@ -1,5 +1,15 @@
+import logging
 import uuid
+from datetime import datetime
+from django.conf import settings
+from django.contrib.postgres.search import SearchVectorField
+from django.core.files.storage import default_storage
 from django.db import models
+from django.utils import timezone
+
+from .imagenes import generar_versiones, procesar_evidencia
+
+logger = logging.getLogger(__name__)
 
 class Categoria(models.Model):
     nombre = models.CharField(max_length=100)
@@ -20,13 +30,16 @@ class Ticket(models.Model):
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     
-    usuario_hash = models.CharField(max_length=64, db_index=True)
+    usuario_hash = models.CharField(max_length=64)
+    hash_version = models.PositiveSmallIntegerField(default=0, editable=False, help_text="Claves aplicadas al usuario_hash (ver tickets/anonimato.py)")
     
     categoria = models.ForeignKey(Categoria, on_delete=models.PROTECT)
     asunto = models.CharField(max_length=200)
     descripcion = models.TextField()
     
     imagen = models.ImageField(upload_to='evidencias/%Y/%m/', blank=True, null=True)
+    imagen_miniatura = models.ImageField(upload_to='evidencias/%Y/%m/', blank=True, null=True, editable=False)
+    imagen_media = models.ImageField(upload_to='evidencias/%Y/%m/', blank=True, null=True, editable=False)
     
     estado = models.CharField(
         max_length=4, 
@@ -39,5 +52,231 @@ class Ticket(models.Model):
 
     comentario_admin = models.TextField(blank=True, help_text="Notas internas de la resolución")
 
+    # Solo PostgreSQL: lo mantiene un trigger (ver tickets/busqueda.py)
+    busqueda = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # Historial reciente de un reportante (anti-flood en crear_queja); cubre también usuario_hash solo
+            models.Index(fields=['usuario_hash', '-fecha_creacion'], name='ticket_usuario_fecha_idx'),
+            # Dashboard público y filtro por estado del admin, ordenados por fecha
+            models.Index(fields=['estado', '-fecha_creacion'], name='ticket_estado_fecha_idx'),
+            # Filtros combinados categoría + estado + fecha del admin
+            models.Index(fields=['categoria', 'estado', '-fecha_creacion'], name='ticket_cat_estado_fecha_idx'),
+            # Solo los tickets públicos (sin spam) para "Última actividad"
+            models.Index(
+                fields=['-fecha_creacion'],
+                condition=~models.Q(estado='RECH'),
+                name='ticket_publico_fecha_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.categoria} - {self.asunto} ({self.get_estado_display()})"
+
+    # (evidencia, versiones) ya procesadas por preparar_imagen(); () si falló y se guarda el original
+    _evidencia_preparada = None
+
+    def save(self, *args, **kwargs):
+        # Solo se procesa un archivo recién subido (todavía no guardado en el storage)
+        if self.imagen and not self.imagen._committed:
+            self.preparar_imagen()
+            if self._evidencia_preparada:
+                evidencia, versiones = self._evidencia_preparada
+                self.imagen.save(evidencia.name, evidencia, save=False)
+                self._guardar_versiones(versiones)
+            self._evidencia_preparada = None
+        elif not self.imagen:
+            self.imagen_miniatura = None
+            self.imagen_media = None
+        super().save(*args, **kwargs)
+
+    def preparar_imagen(self):
+        """Quita EXIF, re-codifica y genera las versiones de una evidencia recién subida, en memoria.
+        Llamarla antes de abrir la transacción: así save() solo guarda los archivos ya listos."""
+        if not self.imagen or self.imagen._committed or self._evidencia_preparada is not None:
+            return
+        try:
+            self._evidencia_preparada = procesar_evidencia(self.imagen.file)
+        except Exception:
+            logger.exception("No se pudo procesar la imagen, se guarda el original")
+            self._evidencia_preparada = ()
+
+    def _guardar_versiones(self, versiones):
+        self.imagen_miniatura.save(versiones['miniatura'].name, versiones['miniatura'], save=False)
+        self.imagen_media.save(versiones['media'].name, versiones['media'], save=False)
+
+    def asegurar_versiones(self):
+        """Genera la miniatura y la versión media si faltan (evidencias subidas antes del pipeline).
+        Se guardan con update() para no volver a disparar save() ni las señales."""
+        if not self.imagen or (self.imagen_miniatura and self.imagen_media):
+            return
+        try:
+            with self.imagen.open('rb') as archivo:
+                versiones = generar_versiones(archivo)
+        except Exception:
+            logger.exception("No se pudieron generar las versiones de %s", self.imagen.name)
+            return
+        self._guardar_versiones(versiones)
+        Ticket.objects.filter(pk=self.pk).update(
+            imagen_miniatura=self.imagen_miniatura.name,
+            imagen_media=self.imagen_media.name,
+        )
+
+
+class CorreoPendiente(models.Model):
+    class Estado(models.TextChoices):
+        PENDIENTE = 'PEND', 'Pendiente'
+        ENVIADO = 'ENV', 'Enviado'
+        FALLIDO = 'FALL', 'Fallido'
+
+    asunto = models.CharField(max_length=255)
+    mensaje = models.TextField()
+    remitente = models.CharField(max_length=255, blank=True)
+    destinatarios = models.TextField(help_text="Correos separados por coma")
+
+    estado = models.CharField(
+        max_length=4,
+        choices=Estado.choices,
+        default=Estado.PENDIENTE
+    )
+    intentos = models.PositiveSmallIntegerField(default=0)
+    proximo_intento = models.DateTimeField(default=timezone.now)
+    ultimo_error = models.TextField(blank=True)
+
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_envio = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['estado', 'proximo_intento'], name='correo_cola_idx'),
+        ]
+
+    def lista_destinatarios(self):
+        return [email.strip() for email in self.destinatarios.split(',') if email.strip()]
+
+    def __str__(self):
+        return f"{self.asunto} -> {self.destinatarios} ({self.get_estado_display()})"
+
+
+class DashboardSnapshot(models.Model):
+    # Fila única con los contadores de /transparencia/, mantenida por tickets/signals.py
+    pendientes = models.PositiveIntegerField(default=0)
+    en_proceso = models.PositiveIntegerField(default=0)
+    resueltos = models.PositiveIntegerField(default=0)
+    rechazados = models.PositiveIntegerField(default=0)
+    ultimos = models.JSONField(default=list, blank=True)
+    actualizado = models.DateTimeField(auto_now=True)
+
+    @property
+    def total(self):
+        return self.pendientes + self.en_proceso + self.resueltos
+
+    def ultimos_tickets(self):
+        # Misma forma que usa la plantilla: ticket.categoria.nombre, ticket.fecha_creacion, ticket.estado
+        return [
+            {
+                'categoria': {'nombre': item['categoria']},
+                'fecha_creacion': datetime.fromisoformat(item['fecha_creacion']),
+                'estado': item['estado'],
+            }
+            for item in self.ultimos
+        ]
+
+    def __str__(self):
+        return f"Snapshot ({self.actualizado:%d/%m/%Y %H:%M})"
+
+
+def almacenamiento_informes():
+    # MediaCloudinaryStorage solo sube imágenes: los .docx/.zip van a Cloudinary como "raw"
+    if settings.CLOUDINARY_STORAGE.get('API_KEY'):
+        from cloudinary_storage.storage import RawMediaCloudinaryStorage
+        return RawMediaCloudinaryStorage()
+    return default_storage
+
+
+class InformeLote(models.Model):
+    class Estado(models.TextChoices):
+        PENDIENTE = 'PEND', 'En cola'
+        PROCESANDO = 'PROC', 'Generando'
+        LISTO = 'OK', 'Listo'
+        ERROR = 'ERR', 'Error'
+
+    tickets = models.JSONField(default=list, help_text="IDs de los tickets incluidos")
+    estado = models.CharField(
+        max_length=4,
+        choices=Estado.choices,
+        default=Estado.PENDIENTE
+    )
+    total = models.PositiveIntegerField(default=0)
+    procesados = models.PositiveIntegerField(default=0)
+    archivo = models.FileField(upload_to='informes/', storage=almacenamiento_informes, blank=True)
+    error = models.TextField(blank=True)
+
+    solicitado_por = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL)
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_inicio = models.DateTimeField(null=True, blank=True)
+    fecha_fin = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "informe por lote"
+        verbose_name_plural = "informes por lote"
+
+    @property
+    def progreso(self):
+        return int(self.procesados * 100 / self.total) if self.total else 0
+
+    def __str__(self):
+        return f"Lote #{self.pk} - {self.total} informes ({self.get_estado_display()})"
+
+
+class TicketEvento(models.Model):
+    """Historial de estados (solo se agregan filas): una fila compacta por ticket y transición.
+    La creación del ticket se registra con estado_anterior vacío."""
+
+    class Origen(models.TextChoices):
+        ADMIN = 'ADM', 'Panel de administración'
+        COMANDO = 'CMD', 'Comando de gestión'
+        SISTEMA = 'SIS', 'Sistema'
+
+    ticket = models.ForeignKey(Ticket, on_delete=models.CASCADE, related_name='eventos', db_index=False)
+    estado_anterior = models.CharField(max_length=4, choices=Ticket.Estado.choices, blank=True)
+    estado_nuevo = models.CharField(max_length=4, choices=Ticket.Estado.choices)
+    fecha = models.DateTimeField(default=timezone.now)
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL, related_name='+'
+    )
+    origen = models.CharField(max_length=3, choices=Origen.choices, default=Origen.ADMIN)
+
+    class Meta:
+        verbose_name = "evento de ticket"
+        verbose_name_plural = "eventos de tickets"
+        indexes = [
+            # Historial de un ticket en orden; cubre también las búsquedas por ticket solo
+            models.Index(fields=['ticket', 'fecha'], name='evento_ticket_fecha_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.ticket_id}: {self.estado_anterior} -> {self.estado_nuevo} ({self.fecha:%d/%m/%Y %H:%M})"
+
+
+class ResumenCategoria(models.Model):
+    """Resumen diario por categoría para la página de transparencia (lo llena resumir_categorias)."""
+
+    fecha = models.DateField()
+    categoria = models.ForeignKey(Categoria, on_delete=models.CASCADE, related_name='resumenes')
+    abiertos = models.PositiveIntegerField(default=0, help_text="Pendientes + en proceso")
+    resueltos_30d = models.PositiveIntegerField(default=0)
+    mediana_resolucion = models.DurationField(null=True, blank=True)
+    p90_resolucion = models.DurationField(null=True, blank=True)
+    actualizado = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "resumen por categoría"
+        verbose_name_plural = "resúmenes por categoría"
+        constraints = [
+            models.UniqueConstraint(fields=['fecha', 'categoria'], name='resumen_fecha_categoria_uniq'),
+        ]
+
     def __str__(self):
-        return f"{self.categoria} - {self.asunto} ({self.get_estado_display()})"
\ No newline at end of file
+        return f"{self.categoria} ({self.fecha:%d/%m/%Y})"
@@ -0,0 +1,112 @@
+import secrets
+import time
+
+from django.conf import settings
+from django.core import signing
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+# Estado del flujo estudiante (código enviado -> validado). Dos modos, según settings.OTP_MODO:
+#   "sesion": se guarda en request.session (una lectura/escritura de sesión por paso).
+#   "token":  sin estado en el servidor. El desafío viaja en una cookie firmada con
+#             HMAC(email, código, expiración); tras validar, otra cookie firmada con el email.
+#             Verificar no toca la base de datos y funciona igual en cualquier lambda.
+
+COOKIE_DESAFIO = 'otp_desafio'
+COOKIE_ACCESO = 'otp_acceso'
+SAL_DESAFIO = 'tickets.otp.desafio'
+SAL_ACCESO = 'tickets.otp.acceso'
+
+
+def _modo_token():
+    return settings.OTP_MODO == 'token'
+
+
+def _huella(email, codigo, expira):
+    return salted_hmac('tickets.otp', f"{email}:{codigo}:{expira}").hexdigest()
+
+
+def _poner_cookie(response, nombre, valor, max_age):
+    response.set_cookie(
+        nombre, valor, max_age=max_age, httponly=True, samesite='Lax',
+        secure=settings.SESSION_COOKIE_SECURE,
+    )
+
+
+def _desafio(request):
+    try:
+        datos = signing.loads(request.COOKIES.get(COOKIE_DESAFIO, ''), salt=SAL_DESAFIO)
+    except signing.BadSignature:
+        return None
+    return datos if datos['x'] >= time.time() else None
+
+
+def generar_codigo():
+    return f"{secrets.randbelow(1_000_000):06d}"
+
+
+def iniciar(request, response, email, codigo):
+    validez = settings.OTP_VALIDEZ_SEGUNDOS
+    expira = int(time.time()) + validez
+    huella = _huella(email, codigo, expira)
+    if _modo_token():
+        token = signing.dumps({'e': email, 'x': expira, 'h': huella}, salt=SAL_DESAFIO)
+        _poner_cookie(response, COOKIE_DESAFIO, token, validez)
+    else:
+        # Solo la huella del código: con sesiones en cookie firmada el cliente puede leer la sesión
+        request.session['otp_huella'] = huella
+        request.session['otp_expira'] = expira
+        request.session['otp_email'] = email
+        request.session.set_expiry(settings.SESION_ESTUDIANTE_SEGUNDOS)
+
+
+def email_pendiente(request):
+    if _modo_token():
+        datos = _desafio(request)
+        return datos['e'] if datos else None
+    return request.session.get('otp_email')
+
+
+def verificar(request, codigo):
+    if _modo_token():
+        datos = _desafio(request)
+        return bool(datos) and constant_time_compare(_huella(datos['e'], codigo, datos['x']), datos['h'])
+    expira = request.session.get('otp_expira', 0)
+    if expira < time.time():
+        return False
+    huella = _huella(request.session.get('otp_email'), codigo, expira)
+    return constant_time_compare(huella, request.session.get('otp_huella', ''))
+
+
+def marcar_validado(request, response):
+    if _modo_token():
+        token = signing.dumps({'e': _desafio(request)['e']}, salt=SAL_ACCESO)
+        _poner_cookie(response, COOKIE_ACCESO, token, settings.SESION_ESTUDIANTE_SEGUNDOS)
+        response.delete_cookie(COOKIE_DESAFIO)
+    else:
+        request.session['es_estudiante_validado'] = True
+        for key in ['otp_huella', 'otp_expira']:
+            request.session.pop(key, None)
+
+
+def email_validado(request):
+    if _modo_token():
+        try:
+            datos = signing.loads(
+                request.COOKIES.get(COOKIE_ACCESO, ''), salt=SAL_ACCESO,
+                max_age=settings.SESION_ESTUDIANTE_SEGUNDOS,
+            )
+        except signing.BadSignature:
+            return None
+        return datos['e']
+    if request.session.get('es_estudiante_validado'):
+        return request.session.get('otp_email', "error_sesion")
+    return None
+
+
+def cerrar(request, response):
+    if _modo_token():
+        response.delete_cookie(COOKIE_DESAFIO)
+        response.delete_cookie(COOKIE_ACCESO)
+    else:
+        for key in ['es_estudiante_validado', 'otp_email', 'otp_huella', 'otp_expira']:
+            request.session.pop(key, None)
@@ -0,0 +1,133 @@
+import time as reloj
+from datetime import date, datetime, time, timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count, DateField
+from django.db.models.functions import TruncDate, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from .models import Ticket
+
+# Conteo de tickets públicos (sin spam) por período de fecha_creacion, por estado y por categoría.
+# Se guarda en el alias de caché "series" con dos claves por tipo de período: todos los períodos
+# cerrados hasta el máximo (SERIE_CACHE_CERRADO_SEGUNDOS) y el actual (SERIE_CACHE_ACTUAL_SEGUNDOS);
+# cada request recorta la cantidad pedida. Un cambio de estado o un borrado mueve conteos de
+# períodos cerrados: sube la "generación" de la caché (invalidar()) y la siguiente consulta los
+# recalcula.
+
+PERIODOS = {
+    # nombre: (función de truncado, cantidad por defecto, máximo)
+    'dia': (TruncDate, 30, 366),
+    'semana': (TruncWeek, 12, 104),
+    'mes': (TruncMonth, 12, 60),
+}
+CLAVE_GENERACION = 'serie:generacion'
+
+
+def inicio_de(fecha, periodo):
+    if periodo == 'semana':
+        return fecha - timedelta(days=fecha.weekday())
+    if periodo == 'mes':
+        return fecha.replace(day=1)
+    return fecha
+
+
+def siguiente(inicio, periodo):
+    if periodo == 'semana':
+        return inicio + timedelta(days=7)
+    if periodo == 'mes':
+        return date(inicio.year + inicio.month // 12, inicio.month % 12 + 1, 1)
+    return inicio + timedelta(days=1)
+
+
+def _inicios(periodo, cantidad):
+    inicio = inicio_de(timezone.localdate(), periodo)
+    inicios = [inicio]
+    for _ in range(cantidad - 1):
+        inicio = inicio_de(inicio - timedelta(days=1), periodo)
+        inicios.append(inicio)
+    return inicios[::-1]
+
+
+def _generacion():
+    # Si la clave se pierde se parte de la hora actual, nunca de una generación ya usada
+    cache = caches['series']
+    cache.add(CLAVE_GENERACION, reloj.time_ns(), None)
+    return cache.get(CLAVE_GENERACION)
+
+
+def invalidar():
+    cache = caches['series']
+    try:
+        cache.incr(CLAVE_GENERACION)
+    except ValueError:
+        cache.set(CLAVE_GENERACION, reloj.time_ns(), None)
+
+
+def claves(periodo, actual):
+    """(clave de los períodos cerrados, clave del período actual) para la generación vigente."""
+    prefijo = f"serie:{_generacion()}:{periodo}:{actual.isoformat()}"
+    return f"{prefijo}:cerrados", f"{prefijo}:actual"
+
+
+def _desde_fecha(dia):
+    return timezone.make_aware(datetime.combine(dia, time.min))
+
+
+def _calcular(periodo, inicios):
+    # Una consulta agrupada para todos los períodos que faltan; usa ticket_publico_fecha_idx
+    truncar = PERIODOS[periodo][0]
+    filas = (
+        Ticket.objects.exclude(estado=Ticket.Estado.RECHAZADO)
+        .filter(
+            fecha_creacion__gte=_desde_fecha(inicios[0]),
+            fecha_creacion__lt=_desde_fecha(siguiente(inicios[-1], periodo)),
+        )
+        .annotate(periodo=truncar('fecha_creacion', output_field=DateField()))
+        .values('periodo', 'estado', 'categoria_id')
+        .annotate(n=Count('id'))
+        .order_by()
+    )
+    buscados = set(inicios)
+    resultado = {inicio: {'total': 0, 'por_estado': {}, 'por_categoria': {}} for inicio in inicios}
+    for fila in filas:
+        inicio = inicio_de(fila['periodo'], periodo)
+        if inicio not in buscados:
+            continue
+        datos = resultado[inicio]
+        datos['total'] += fila['n']
+        datos['por_estado'][fila['estado']] = datos['por_estado'].get(fila['estado'], 0) + fila['n']
+        categoria = str(fila['categoria_id'])
+        datos['por_categoria'][categoria] = datos['por_categoria'].get(categoria, 0) + fila['n']
+    return resultado
+
+
+def serie(periodo, cantidad=None):
+    """Lista de {'inicio', 'cerrado', 'total', 'por_estado', 'por_categoria' (por id)} en orden."""
+    _, por_defecto, maximo = PERIODOS[periodo]
+    cantidad = max(1, min(cantidad or por_defecto, maximo))
+    inicios = _inicios(periodo, maximo)
+    actual = inicios[-1]
+
+    cache = caches['series']
+    clave_cerrados, clave_actual = claves(periodo, actual)
+    en_cache = cache.get_many([clave_cerrados, clave_actual])
+    cerrados = en_cache.get(clave_cerrados)
+    datos_actual = en_cache.get(clave_actual)
+
+    if cerrados is None or datos_actual is None:
+        faltan = (inicios[:-1] if cerrados is None else []) + ([actual] if datos_actual is None else [])
+        calculados = _calcular(periodo, faltan)
+        if datos_actual is None:
+            datos_actual = calculados.pop(actual)
+            cache.set(clave_actual, datos_actual, settings.SERIE_CACHE_ACTUAL_SEGUNDOS)
+        if cerrados is None:
+            cerrados = calculados
+            cache.set(clave_cerrados, cerrados, settings.SERIE_CACHE_CERRADO_SEGUNDOS)
+
+    return [
+        {'inicio': inicio.isoformat(), 'cerrado': inicio != actual,
+         **(datos_actual if inicio == actual else cerrados[inicio])}
+        for inicio in inicios[-cantidad:]
+    ]
@@ -0,0 +1,67 @@
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import series
+from .models import Categoria, Ticket, TicketEvento
+from .transparencia import aplicar_deltas, refrescar_ultimos
+
+
+# Campos que mueven el snapshot (conteos y "Última actividad") y la serie temporal
+CAMPOS_CONTADOS = ('estado', 'categoria_id', 'fecha_creacion')
+
+
+def _contados(instance):
+    return tuple(instance.__dict__.get(campo) for campo in CAMPOS_CONTADOS)
+
+
+@receiver(post_init, sender=Ticket)
+def recordar_estado(sender, instance, **kwargs):
+    # Con .only()/.defer() el estado puede no estar cargado; en ese caso no lo forzamos
+    instance._estado_guardado = instance.__dict__.get('estado')
+    instance._contados_guardados = _contados(instance)
+
+
+@receiver(post_save, sender=Ticket)
+def ticket_guardado(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    # Un campo diferido (None) cuenta como cambiado: no sabemos, y el reconcile corrige
+    guardados = instance._contados_guardados
+    if not created and None not in guardados and guardados == _contados(instance):
+        return  # p.ej. el admin solo editó comentario_admin
+    anterior = None if created else instance._estado_guardado
+    if not created and anterior is None:
+        anterior = instance.estado  # Estado diferido: no sabemos si cambió, el reconcile corrige
+    deltas = {}
+    if anterior != instance.estado:
+        if anterior is not None:
+            deltas[anterior] = -1
+        deltas[instance.estado] = deltas.get(instance.estado, 0) + 1
+        # Quien guarda desde el admin deja usuario/origen en la instancia (TicketAdmin.save_model)
+        TicketEvento.objects.create(
+            ticket=instance,
+            estado_anterior=anterior or '',
+            estado_nuevo=instance.estado,
+            fecha=instance.fecha_creacion if created else timezone.now(),
+            usuario=getattr(instance, '_evento_usuario', None),
+            origen=getattr(instance, '_evento_origen', TicketEvento.Origen.SISTEMA),
+        )
+    aplicar_deltas(deltas)
+    if not created:
+        series.invalidar()  # Puede mover conteos de períodos ya cerrados
+    instance._estado_guardado = instance.estado
+    instance._contados_guardados = _contados(instance)
+
+
+@receiver(post_delete, sender=Ticket)
+def ticket_eliminado(sender, instance, **kwargs):
+    estado = instance._estado_guardado or instance.estado
+    aplicar_deltas({estado: -1})
+    series.invalidar()
+
+
+@receiver(post_save, sender=Categoria)
+def categoria_guardada(sender, instance, created, raw=False, **kwargs):
+    if not raw and not created:
+        refrescar_ultimos()
@@ -1,3 +1,875 @@
-from django.test import TestCase
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import zipfile
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core import mail
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core import signing
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.core.signing import JSONSerializer
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from docx import Document
+from PIL import Image
+
+from . import busqueda, instrumentacion, limites, otp, series
+from .anonimato import generar_hash_anonimo, version_actual
+from .admin import TicketAdmin
+from .correo import encolar_correo, procesar_pendientes
+from .documentos import CONTENT_TYPE_DOCX, renderizar_informe
+from .estadisticas import mediana_resolucion_por_categoria
+from .imagenes import imagen_para_informe, procesar_evidencia
+from .informes import crear_lote, informe_individual, procesar_lote
+from .deteccion import MotorPalabras, analizar_texto
+from .models import (
+    Categoria, CorreoPendiente, DashboardSnapshot, InformeLote, ResumenCategoria, Ticket, TicketEvento,
+    almacenamiento_informes,
+)
+from .transiciones import cambiar_estado
+from .transparencia import obtener_snapshot, reconciliar
+
+
+
+def limpiar_caches():
+    for alias in settings.CACHES:
+        caches[alias].clear()
+
+class DeteccionPalabrasTests(TestCase):
+    def test_no_coincide_dentro_de_otra_palabra(self):
+        coincidencias = analizar_texto("Concepto de la materia")
+        self.assertFalse(coincidencias.spam)
+
+    def test_ignora_tildes_y_mayusculas(self):
+        coincidencias = analizar_texto("Un CABRON y un imbecil")
+        self.assertEqual(coincidencias.spam, {'cabrón', 'cabron', 'imbécil', 'imbecil'})
+
+    def test_conserva_la_enie(self):
+        self.assertFalse(analizar_texto("Este año el cono del laboratorio se rompió").spam)
+        self.assertEqual(analizar_texto("¡CoÑo!").spam, {'coño'})
+        self.assertEqual(analizar_texto("Un cabrón"), analizar_texto("Un cabron"))
+
+    def test_una_pasada_devuelve_alertas_y_spam(self):
+        coincidencias = analizar_texto("Hubo un robo, hijo de puta. ¡Urgente!")
+        self.assertEqual(coincidencias.alertas, {'robo', 'urgente'})
+        self.assertIn('hijo de puta', coincidencias.spam)
+        self.assertIn('puta', coincidencias.spam)
+
+    def test_patrones_que_se_solapan(self):
+        motor = MotorPalabras({'g': ['he', 'she', 'hers', 'his']})
+        self.assertEqual(motor.buscar("ushers she his"), {'g': {'she', 'his'}})
+
+
+class ColaCorreoTests(TestCase):
+    def setUp(self):
+        limpiar_caches()
+
+    def test_solicitar_acceso_solo_encola(self):
+        self.client.post(reverse('solicitar_acceso'), {'email': 'alumno@est.emi.edu.bo'})
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(CorreoPendiente.objects.filter(estado='PEND').count(), 1)
+
+    def test_lote_se_envia_y_marca_enviado(self):
+        for i in range(3):
+            encolar_correo(f"Asunto {i}", "Cuerpo", [f"a{i}@est.emi.edu.bo"])
+        self.assertEqual(procesar_pendientes(), (3, 0))
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertFalse(CorreoPendiente.objects.exclude(estado='ENV').exists())
+
+    def test_tras_el_commit_se_intenta_enviar(self):
+        with mock.patch('tickets.correo.lanzar_envio') as lanzar:
+            with self.captureOnCommitCallbacks(execute=True):
+                encolar_correo("Asunto", "Cuerpo", ["a@est.emi.edu.bo"])
+                encolar_correo("Asunto", "Cuerpo", ["b@est.emi.edu.bo"])
+        self.assertTrue(lanzar.called)
+        with override_settings(CORREO_ENVIO_INMEDIATO=False), self.captureOnCommitCallbacks() as callbacks:
+            encolar_correo("Asunto", "Cuerpo", ["c@est.emi.edu.bo"])
+        self.assertEqual(callbacks, [])
+
+    @override_settings(CRON_SECRET='secreto')
+    def test_cron_vacia_la_cola_solo_con_secreto(self):
+        encolar_correo("Asunto", "Cuerpo", ["a@est.emi.edu.bo"])
+        url = reverse('tarea_procesar_correos')
+        self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION='Bearer otro').status_code, 403)
+        self.assertEqual(len(mail.outbox), 0)
+        response = self.client.get(url, HTTP_AUTHORIZATION='Bearer secreto')
+        self.assertEqual(response.json(), {'enviados': 1, 'fallidos': 0})
+        self.assertEqual(len(mail.outbox), 1)
+
+    @override_settings(CORREO_MAX_INTENTOS=2, CORREO_REINTENTO_SEGUNDOS=10)
+    def test_fallo_reintenta_con_espera_y_luego_descarta(self):
+        correo = encolar_correo("Asunto", "Cuerpo", ["a@est.emi.edu.bo"])
+        with mock.patch('django.core.mail.EmailMessage.send', side_effect=OSError("smtp caído")), \
+                self.assertLogs('tickets.correo', 'ERROR') as registros:
+            self.assertEqual(procesar_pendientes(), (0, 1))
+            correo.refresh_from_db()
+            self.assertEqual(correo.estado, 'PEND')
+            self.assertGreater(correo.proximo_intento, timezone.now())
+
+            CorreoPendiente.objects.update(proximo_intento=timezone.now())
+            procesar_pendientes()
+            correo.refresh_from_db()
+            self.assertEqual(correo.estado, 'FALL')
+        # Sin direcciones en los registros
+        self.assertNotIn('@', ' '.join(registros.output))
+
+
+class DashboardPublicoTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        categorias = [
+            Categoria.objects.create(nombre=f"Cat {i}", email_responsable=f"resp{i}@emi.edu.bo")
+            for i in range(3)
+        ]
+        estados = ['PEND', 'PROC', 'RES', 'RES', 'RECH']
+        for i in range(20):
+            Ticket.objects.create(
+                usuario_hash='x' * 64, categoria=categorias[i % 3],
+                asunto=f"Asunto {i}", descripcion="...", estado=estados[i % 5],
+            )
+
+    def test_contadores_y_ultimos_sin_tocar_tickets(self):
+        # Snapshot + resumen por categoría
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('dashboard_publico'))
+        self.assertEqual(response.context['total'], 16)
+        self.assertEqual(response.context['resueltos'], 8)
+        self.assertEqual(response.context['en_proceso'], 4)
+        self.assertEqual(response.context['pendientes'], 4)
+        self.assertEqual(len(response.context['ultimos_tickets']), 10)
+
+    def test_snapshot_sigue_cambios_masivos_y_borrados(self):
+        cambiar_estado(Ticket.objects.filter(estado='PEND'), Ticket.Estado.RESUELTO)
+        Ticket.objects.filter(estado='PROC').first().delete()
+        snapshot = obtener_snapshot()
+        self.assertEqual((snapshot.pendientes, snapshot.en_proceso, snapshot.resueltos), (0, 3, 12))
+        self.assertEqual(reconciliar(), {})
+
+    def test_guardar_sin_cambiar_campos_contados_no_toca_snapshot_ni_serie(self):
+        generacion = series._generacion()
+        ticket = Ticket.objects.get(asunto="Asunto 0")
+        ticket.comentario_admin = "Revisado"
+        with CaptureQueriesContext(connection) as consultas:
+            ticket.save()
+        self.assertEqual(len(consultas.captured_queries), 1)  # solo el UPDATE del ticket
+        self.assertEqual(series._generacion(), generacion)
+
+        ticket.estado = Ticket.Estado.RESUELTO
+        ticket.save()
+        self.assertNotEqual(series._generacion(), generacion)
+        self.assertEqual(obtener_snapshot().pendientes, 3)
+
+    def test_resta_duplicada_se_acota_en_cero(self):
+        # Como si otro guardado concurrente ya hubiera restado este pendiente
+        DashboardSnapshot.objects.update(pendientes=0)
+        Ticket.objects.filter(estado='PEND').first().delete()
+        self.assertEqual(obtener_snapshot().pendientes, 0)
+        self.assertEqual(reconciliar(), {'pendientes': (0, 3)})
+
+    def test_reconciliar_corrige_desvio(self):
+        DashboardSnapshot.objects.update(resueltos=999)
+        self.assertEqual(reconciliar(), {'resueltos': (999, 8)})
+        self.assertEqual(obtener_snapshot().resueltos, 8)
+
+
+class IndicesTicketTests(TestCase):
+    def test_planificador_usa_indices_compuestos(self):
+        # Con filas sembradas y ANALYZE (el mismo camino que explicar_indices), no sobre una tabla vacía
+        salida = StringIO()
+        call_command('explicar_indices', filas=10000, stdout=salida)
+        for indice in ('ticket_publico_fecha_idx', 'ticket_usuario_fecha_idx',
+                       'ticket_estado_fecha_idx', 'ticket_cat_estado_fecha_idx'):
+            with self.subTest(indice=indice):
+                self.assertIn(f"usa {indice}", salida.getvalue())
+                self.assertNotIn(f"NO usa {indice}", salida.getvalue())
+        self.assertFalse(Ticket.objects.exists())
+
+
+class BusquedaTextoTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        categoria = Categoria.objects.create(nombre="Cat", email_responsable="resp@emi.edu.bo")
+        cls.proyector = Ticket.objects.create(
+            usuario_hash='x' * 64, categoria=categoria,
+            asunto="Proyector dañado", descripcion="El proyector del aula B-102 no enciende",
+        )
+        cls.bano = Ticket.objects.create(
+            usuario_hash='x' * 64, categoria=categoria,
+            asunto="Baño sin agua", descripcion="Desde el lunes no hay agua en el bloque C",
+        )
+
+    def buscar(self, termino):
+        return set(busqueda.filtrar(Ticket.objects.all(), termino))
+
+    def test_busca_por_palabras_sin_tildes(self):
+        self.assertEqual(self.buscar("bano agua"), {self.bano})
+        self.assertEqual(self.buscar('proyector "B-102'), {self.proyector})
+
+    def test_indice_sigue_las_ediciones_y_borrados(self):
+        Ticket.objects.filter(pk=self.bano.pk).update(descripcion="Proyector roto en el bloque C")
+        self.assertEqual(self.buscar("proyector"), {self.proyector, self.bano})
+        self.proyector.delete()
+        self.assertEqual(self.buscar("proyector"), {self.bano})
+
+
+def codigo_enviado():
+    return re.search(r'\d{6}', CorreoPendiente.objects.latest('pk').mensaje).group()
+
+
+class LimitesTasaTests(TestCase):
+    def setUp(self):
+        limpiar_caches()
+
+    def test_token_bucket_se_recarga_con_el_tiempo(self):
+        with mock.patch('tickets.limites.time.time', return_value=1000.0):
+            resultados = [limites.consumir('otp_email', 'a@est.emi.edu.bo') for _ in range(4)]
+        self.assertEqual(resultados, [True, True, True, False])
+        with mock.patch('tickets.limites.time.time', return_value=1061.0):
+            self.assertTrue(limites.consumir('otp_email', 'a@est.emi.edu.bo'))
+
+    def test_sin_rafaga_doble_en_el_borde_de_una_ventana(self):
+        # 3 intentos justo antes de un múltiplo de la "ventana" (180 s) y 3 justo después: solo pasan los primeros
+        with mock.patch('tickets.limites.time.time', return_value=1079.0):
+            antes = [limites.consumir('otp_email', 'a@est.emi.edu.bo') for _ in range(3)]
+        with mock.patch('tickets.limites.time.time', return_value=1081.0):
+            despues = [limites.consumir('otp_email', 'a@est.emi.edu.bo') for _ in range(3)]
+        self.assertEqual(antes, [True, True, True])
+        self.assertEqual(despues, [False, False, False])
+
+    def test_concurrencia_no_pierde_fichas(self):
+        resultados = []
+        hilos = [
+            threading.Thread(target=lambda: resultados.append(limites.consumir('otp_ip', '10.0.0.1')))
+            for _ in range(30)
+        ]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        self.assertEqual(resultados.count(True), 10)
+
+    def test_candado_ocupado_niega(self):
+        caches['limites'].add('limite:otp_email:a@est.emi.edu.bo:candado', 1, 60)
+        with mock.patch('tickets.limites.time.sleep') as dormir:
+            self.assertFalse(limites.consumir('otp_email', 'a@est.emi.edu.bo'))
+        self.assertEqual(dormir.call_count, limites.INTENTOS_CANDADO)
+
+    def test_no_usa_el_cache_por_defecto(self):
+        limites.consumir('otp_email', 'a@est.emi.edu.bo')
+        cache.clear()
+        for _ in range(2):
+            limites.consumir('otp_email', 'a@est.emi.edu.bo')
+        self.assertFalse(limites.consumir('otp_email', 'a@est.emi.edu.bo'))
+
+    @override_settings(PROXIES_CONFIABLES=1)
+    def test_ip_cliente_ignora_entradas_del_cliente(self):
+        request = RequestFactory().get('/', HTTP_X_FORWARDED_FOR='1.2.3.4, 200.87.1.9', REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(limites.ip_cliente(request), '200.87.1.9')
+        request = RequestFactory().get('/', REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(limites.ip_cliente(request), '10.0.0.1')
+
+    @override_settings(PROXIES_CONFIABLES=0)
+    def test_ip_cliente_sin_proxies_usa_remote_addr(self):
+        request = RequestFactory().get('/', HTTP_X_FORWARDED_FOR='1.2.3.4', REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(limites.ip_cliente(request), '10.0.0.1')
+
+    def test_solicitar_acceso_corta_antes_de_encolar(self):
+        for _ in range(3):
+            self.client.post(reverse('solicitar_acceso'), {'email': 'alumno@est.emi.edu.bo'})
+        response = self.client.post(reverse('solicitar_acceso'), {'email': 'alumno@est.emi.edu.bo'})
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(CorreoPendiente.objects.count(), 3)
+
+    @override_settings(LIMITES_TASA={**settings.LIMITES_TASA, 'validar_email': {'capacidad': 2, 'por_minuto': 1}})
+    def test_validar_codigo_limita_los_intentos(self):
+        self.client.post(reverse('solicitar_acceso'), {'email': 'alumno@est.emi.edu.bo'})
+        codigo = codigo_enviado()
+        for _ in range(2):
+            self.client.post(reverse('validar_codigo'), {'codigo': '000000'})
+        response = self.client.post(reverse('validar_codigo'), {'codigo': codigo})
+        self.assertEqual(response.status_code, 429)
+        self.assertNotIn('es_estudiante_validado', self.client.session)
+
+
+def foto_de_prueba(ancho=3000, alto=2000):
+    imagen = Image.new('RGB', (ancho, alto), (200, 30, 30))
+    exif = Image.Exif()
+    exif[0x010F] = "TelefonoX"  # Make
+    exif[0x0112] = 6  # Orientation: rotar 90°
+    salida = BytesIO()
+    imagen.save(salida, 'JPEG', exif=exif)
+    return SimpleUploadedFile('foto.jpg', salida.getvalue(), content_type='image/jpeg')
+
+
+class ProcesamientoImagenTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        ajustes = override_settings(MEDIA_ROOT=self.media)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        self.categoria = Categoria.objects.create(nombre="Cat", email_responsable="resp@emi.edu.bo")
+
+    def test_evidencia_sin_exif_reducida_y_con_miniatura(self):
+        ticket = Ticket.objects.create(
+            usuario_hash='x' * 64, categoria=self.categoria,
+            asunto="Foto", descripcion="...", imagen=foto_de_prueba(),
+        )
+        self.assertTrue(ticket.imagen.name.endswith('.webp'))
+        with Image.open(ticket.imagen.path) as evidencia:
+            self.assertEqual(evidencia.size, (1067, 1600))  # rotada según EXIF y acotada a 1600
+            self.assertFalse(evidencia.getexif())
+        with Image.open(ticket.imagen_miniatura.path) as miniatura:
+            self.assertEqual(miniatura.size, (160, 160))
+        self.assertEqual(os.path.dirname(ticket.imagen.name), os.path.dirname(ticket.imagen_miniatura.name))
+        with Image.open(ticket.imagen_media.path) as media:
+            self.assertEqual(max(media.size), 800)
+
+    def test_evidencias_antiguas_sin_generar_en_el_admin(self):
+        ticket = Ticket.objects.create(usuario_hash='x' * 64, categoria=self.categoria, asunto="A", descripcion="...")
+        nombre = default_storage.save('evidencias/antigua.jpg', foto_de_prueba(400, 300))
+        Ticket.objects.filter(pk=ticket.pk).update(imagen=nombre)
+        ticket.refresh_from_db()
+
+        with self.assertNumQueries(0):
+            html = TicketAdmin(Ticket, admin.site).miniatura(ticket)
+        self.assertIn(ticket.imagen.url, html)
+        self.assertIn('loading="lazy"', html)
+        self.assertFalse(ticket.imagen_miniatura)
+
+        call_command('generar_miniaturas', stdout=StringIO())
+        ticket.refresh_from_db()
+        self.assertTrue(ticket.imagen_miniatura.name.endswith('antigua_mini.webp'))
+        self.assertIn(ticket.imagen_miniatura.url, TicketAdmin(Ticket, admin.site).miniatura(ticket))
+
+
+class ExportarCsvTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        categoria = Categoria.objects.create(nombre="Aulas", email_responsable="resp@emi.edu.bo")
+        for i in range(25):
+            Ticket.objects.create(usuario_hash='x' * 64, categoria=categoria, asunto=f"A{i}", descripcion="d")
+
+    def test_streaming_en_una_consulta(self):
+        response = TicketAdmin(Ticket, admin.site).exportar_a_csv(None, Ticket.objects.all())
+        self.assertTrue(response.streaming)
+        with self.assertNumQueries(1):
+            contenido = b''.join(response.streaming_content).decode()
+        filas = contenido.strip().splitlines()
+        self.assertEqual(len(filas), 26)
+        self.assertIn(',Aulas,A', filas[1])
+
+
+@override_settings(INFORMES_EN_SEGUNDO_PLANO=False)
+class InformesLoteTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        categoria = Categoria.objects.create(nombre="Aulas", email_responsable="resp@emi.edu.bo")
+        for i in range(3):
+            Ticket.objects.create(usuario_hash='x' * 64, categoria=categoria, asunto=f"A{i}", descripcion="d")
+
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        ajustes = override_settings(MEDIA_ROOT=self.media)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+    @override_settings(INFORMES_TRABAJADORES=2)
+    def test_lote_en_pool_genera_zip(self):
+        lote = crear_lote(Ticket.objects.all())
+        self.assertTrue(procesar_lote(lote.pk))
+        self.assertFalse(procesar_lote(lote.pk))  # ya no está en cola
+
+        lote.refresh_from_db()
+        self.assertEqual((lote.estado, lote.procesados, lote.progreso), ('OK', 3, 100))
+        with lote.archivo.open('rb') as archivo, zipfile.ZipFile(archivo) as comprimido:
+            nombres = comprimido.namelist()
+            self.assertEqual(len(nombres), 3)
+            self.assertIn('A0', Document(BytesIO(comprimido.read(nombres[0]))).tables[0].rows[4].cells[1].text)
+
+    @override_settings(INFORMES_TRABAJADORES=2)
+    def test_sin_pool_de_procesos_se_genera_en_serie(self):
+        lote = crear_lote(Ticket.objects.all())
+        with mock.patch('tickets.informes.ProcessPoolExecutor', side_effect=OSError(38, "Function not implemented")), \
+                self.assertLogs('tickets.informes', 'WARNING'):
+            self.assertTrue(procesar_lote(lote.pk))
+        lote.refresh_from_db()
+        self.assertEqual((lote.estado, lote.procesados), ('OK', 3))
+
+    @override_settings(CRON_SECRET='secreto', INFORMES_TRABAJADORES=1)
+    def test_cron_genera_los_lotes_en_cola(self):
+        primero = crear_lote(Ticket.objects.all())
+        segundo = crear_lote(Ticket.objects.filter(asunto='A1'))
+        url = reverse('tarea_procesar_informes')
+        self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION='Bearer otro').status_code, 403)
+
+        datos = self.client.get(url, HTTP_AUTHORIZATION='Bearer secreto').json()
+        self.assertEqual(datos, {'reencolados': 0, 'listos': [primero.pk], 'fallidos': []})
+        self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION='Bearer secreto').json()['listos'], [segundo.pk])
+        self.assertEqual(InformeLote.objects.filter(estado='OK').count(), 2)
+
+    def test_un_solo_ticket_se_descarga_directo(self):
+        response = TicketAdmin(Ticket, admin.site).generar_informe_word(None, Ticket.objects.filter(asunto='A1'))
+        self.assertEqual(response['Content-Type'], CONTENT_TYPE_DOCX)
+        self.assertFalse(InformeLote.objects.exists())
+
+    def test_zip_va_a_cloudinary_como_raw(self):
+        from cloudinary_storage.storage import RawMediaCloudinaryStorage
+        self.assertIs(almacenamiento_informes(), default_storage)
+        with override_settings(CLOUDINARY_STORAGE={**settings.CLOUDINARY_STORAGE, 'API_KEY': 'clave'}):
+            self.assertIsInstance(almacenamiento_informes(), RawMediaCloudinaryStorage)
+
+
+class PlantillaInformeTests(TestCase):
+    def test_cada_informe_parte_de_una_plantilla_limpia(self):
+        base = {
+            'id': 'abc123', 'fecha': '18/10/2026 10:00', 'categoria': 'Aulas', 'prioridad': 1,
+            'estado': 'Pendiente', 'descripcion': 'Detalle', 'imagen': None,
+        }
+        renderizar_informe(dict(base, asunto='Primero'))
+        doc = Document(BytesIO(renderizar_informe(dict(base, asunto='Segundo'))))
+        self.assertEqual([row.cells[1].text for row in doc.tables[0].rows][4], 'Segundo')
+        self.assertEqual(sum('Sin evidencia' in p.text for p in doc.paragraphs), 1)
+
+
+class ImagenInformeTests(TestCase):
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.cache = tempfile.mkdtemp()
+        for directorio in (self.media, self.cache):
+            self.addCleanup(shutil.rmtree, directorio, ignore_errors=True)
+        ajustes = override_settings(MEDIA_ROOT=self.media, INFORMES_CACHE_DIR=self.cache)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        categoria = Categoria.objects.create(nombre="Aulas", email_responsable="resp@emi.edu.bo")
+        self.ticket = Ticket.objects.create(
+            usuario_hash='x' * 64, categoria=categoria, asunto="Foto", descripcion="d", imagen=foto_de_prueba(),
+        )
+
+    def test_evidencia_webp_llega_como_jpeg_y_se_reutiliza(self):
+        _, contenido = informe_individual(self.ticket)
+        self.assertEqual(len(Document(BytesIO(contenido)).inline_shapes), 1)
+        self.assertEqual(len(os.listdir(self.cache)), 1)
+
+        with mock.patch.object(FileSystemStorage, 'open', side_effect=AssertionError("no debe releer")):
+            _, contenido = informe_individual(self.ticket)
+        self.assertEqual(len(Document(BytesIO(contenido)).inline_shapes), 1)
+
+    @override_settings(INFORMES_CACHE_MAX_MB=0)
+    def test_cache_se_poda(self):
+        imagen_para_informe(self.ticket.imagen)
+        ruta = imagen_para_informe(self.ticket.imagen_media)
+        self.assertEqual(os.listdir(self.cache), [os.path.basename(ruta)])
+
+
+class HashAnonimoTests(TestCase):
+    EMAIL = 'alumno@est.emi.edu.bo'
+
+    @override_settings(ANONIMATO_CLAVES=[], ANONIMATO_SAL_LEGADO=settings.SECRET_KEY)
+    def test_sin_claves_coincide_con_el_hash_original(self):
+        esperado = hashlib.sha256(f"{self.EMAIL}{settings.SECRET_KEY}".encode('utf-8')).hexdigest()
+        self.assertEqual(generar_hash_anonimo(self.EMAIL), esperado)
+        self.assertEqual(version_actual(), 0)
+
+    @override_settings(ANONIMATO_SAL_LEGADO='sal-fija')
+    def test_rotar_secret_key_no_cambia_el_hash(self):
+        antes = generar_hash_anonimo(self.EMAIL)
+        with self.settings(SECRET_KEY='otra-clave'):
+            self.assertEqual(generar_hash_anonimo(self.EMAIL), antes)
+
+    @override_settings(ANONIMATO_CLAVES=[])
+    def test_rotacion_por_lotes_sin_conocer_los_correos(self):
+        categoria = Categoria.objects.create(nombre="Cat", email_responsable="resp@emi.edu.bo")
+        ticket = Ticket.objects.create(
+            usuario_hash=generar_hash_anonimo(self.EMAIL), categoria=categoria, asunto="A", descripcion="d",
+        )
+        for claves in (['clave-1'], ['clave-1', 'clave-2']):
+            with self.settings(ANONIMATO_CLAVES=claves):
+                call_command('rotar_hash_anonimo', lote=1, stdout=StringIO())
+                ticket.refresh_from_db()
+                self.assertEqual(ticket.hash_version, len(claves))
+                self.assertEqual(ticket.usuario_hash, generar_hash_anonimo(self.EMAIL))
+
+
+@override_settings(LIMITES_QUEJAS=[(1, 3), (60, 5)])
+class AntiFloodTests(TestCase):
+    def setUp(self):
+        self.categoria = Categoria.objects.create(nombre="Cat", email_responsable="resp@emi.edu.bo")
+        sesion = self.client.session
+        sesion['otp_email'] = 'alumno@est.emi.edu.bo'
+        sesion['es_estudiante_validado'] = True
+        sesion.save()
+
+    def enviar(self):
+        return self.client.post(reverse('crear_queja'), {
+            'categoria': self.categoria.pk, 'asunto': "Aula sin luz", 'descripcion': "Bloque B",
+        })
+
+    def test_corta_antes_de_guardar(self):
+        for _ in range(3):
+            self.assertEqual(self.enviar().status_code, 302)
+        self.assertEqual(self.enviar().status_code, 429)
+        self.assertEqual(Ticket.objects.count(), 3)
+
+    def test_post_invalido_no_consulta_el_historial(self):
+        with mock.patch('tickets.limites.quejas_excedidas') as excedidas:
+            response = self.client.post(reverse('crear_queja'), {'categoria': self.categoria.pk})
+        self.assertEqual(response.status_code, 200)
+        excedidas.assert_not_called()
+
+    def test_conteo_bajo_candado_del_reportante(self):
+        orden = []
+        with mock.patch('tickets.limites.bloquear_reportante', side_effect=lambda h: orden.append('candado')), \
+                mock.patch('tickets.limites.quejas_excedidas',
+                           side_effect=lambda h: orden.append(len(connection.atomic_blocks)) or False):
+            profundidad = len(connection.atomic_blocks)
+            self.assertEqual(self.enviar().status_code, 302)
+        # Descarte previo fuera de la transacción, luego candado y conteo dentro de ella
+        self.assertEqual(orden, [profundidad, 'candado', profundidad + 1])
+
+    def test_imagen_se_procesa_antes_de_la_transaccion(self):
+        profundidad = len(connection.atomic_blocks)
+        llamadas = []
+        original = procesar_evidencia
+
+        def registrar(archivo):
+            llamadas.append(len(connection.atomic_blocks))
+            return original(archivo)
+
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        with override_settings(MEDIA_ROOT=media), mock.patch('tickets.models.procesar_evidencia', registrar):
+            response = self.client.post(reverse('crear_queja'), {
+                'categoria': self.categoria.pk, 'asunto': "Aula sin luz", 'descripcion': "Bloque B",
+                'imagen': foto_de_prueba(400, 300),
+            })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(llamadas, [profundidad])
+        self.assertTrue(Ticket.objects.get().imagen_miniatura)
+
+    def test_ventana_larga(self):
+        for _ in range(5):
+            self.enviar()
+            Ticket.objects.update(fecha_creacion=timezone.now() - timedelta(minutes=5))
+        self.assertEqual(self.enviar().status_code, 429)
+        self.assertEqual(Ticket.objects.count(), 5)
+
+
+@override_settings(SESSION_ENGINE='django.contrib.sessions.backends.db')
+class SesionesTests(TestCase):
+    def setUp(self):
+        limpiar_caches()
+
+    def test_compactar_borra_solo_las_vencidas(self):
+        ahora = timezone.now()
+        for i in range(5):
+            Session.objects.create(session_key=f"vieja{i}", session_data="", expire_date=ahora - timedelta(days=1))
+        Session.objects.create(session_key="vigente", session_data="", expire_date=ahora + timedelta(days=1))
+        call_command('compactar_sesiones', lote=2, stdout=StringIO())
+        self.assertEqual(list(Session.objects.values_list('session_key', flat=True)), ['vigente'])
+
+    @override_settings(SESSION_ENGINE='django.contrib.sessions.backends.signed_cookies')
+    def test_cookie_firmada_no_expone_el_codigo(self):
+        self.client.post(reverse('solicitar_acceso'), {'email': 'alumno@est.emi.edu.bo'})
+        codigo = codigo_enviado()
+        self.assertNotIn(codigo, signing.loads(
+            self.client.cookies[settings.SESSION_COOKIE_NAME].value,
+            salt='django.contrib.sessions.backends.signed_cookies', serializer=JSONSerializer,
+        ).values())
+        self.client.post(reverse('validar_codigo'), {'codigo': codigo})
+        self.assertTrue(self.client.session['es_estudiante_validado'])
+
+
+@override_settings(OTP_MODO='token')
+class OtpTokenTests(TestCase):
+    def setUp(self):
+        limpiar_caches()
+        self.categoria = Categoria.objects.create(nombre="Cat", email_responsable="resp@emi.edu.bo")
+        self.client.post(reverse('solicitar_acceso'), {'email': 'alumno@est.emi.edu.bo'})
+
+    def test_flujo_completo_sin_sesion_y_validacion_sin_bd(self):
+        codigo = codigo_enviado()
+        with self.assertNumQueries(0):
+            response = self.client.post(reverse('validar_codigo'), {'codigo': codigo})
+        self.assertRedirects(response, reverse('crear_queja'), fetch_redirect_response=False)
+        self.client.post(reverse('crear_queja'), {'categoria': self.categoria.pk, 'asunto': "A", 'descripcion': "d"})
+        self.assertEqual(Ticket.objects.get().usuario_hash, generar_hash_anonimo('alumno@est.emi.edu.bo'))
+        self.assertFalse(Session.objects.exists())
+
+    def test_codigo_incorrecto_o_vencido(self):
+        incorrecto = '000000' if codigo_enviado() != '000000' else '111111'
+        self.client.post(reverse('validar_codigo'), {'codigo': incorrecto})
+        self.assertEqual(self.client.get(reverse('crear_queja')).status_code, 302)
+
+        with mock.patch('tickets.otp.time.time', return_value=time.time() + 3600):
+            response = self.client.post(reverse('validar_codigo'), {'codigo': codigo_enviado()})
+        self.assertRedirects(response, reverse('solicitar_acceso'), fetch_redirect_response=False)
+
+    def test_cookie_alterada(self):
+        self.client.cookies[otp.COOKIE_DESAFIO] = self.client.cookies[otp.COOKIE_DESAFIO].value[:-2] + 'xx'
+        response = self.client.post(reverse('validar_codigo'), {'codigo': codigo_enviado()})
+        self.assertRedirects(response, reverse('solicitar_acceso'), fetch_redirect_response=False)
+
+
+class InstrumentacionTests(TestCase):
+    def setUp(self):
+        limpiar_caches()
+        instrumentacion.reiniciar()
+        obtener_snapshot()
+
+    @override_settings(INSTRUMENTACION_CABECERA=True)
+    def test_server_timing_cuenta_consultas_y_plantillas(self):
+        response = self.client.get(reverse('dashboard_publico'))
+        cabecera = response['Server-Timing']
+        self.assertIn('db;dur=', cabecera)
+        self.assertIn('desc="2 consultas"', cabecera)
+        self.assertRegex(cabecera, r'tpl;dur=[1-9]|tpl;dur=0\.[1-9]')
+
+    @override_settings(INSTRUMENTACION_CABECERA=False)
+    def test_server_timing_solo_para_staff(self):
+        self.assertNotIn('Server-Timing', self.client.get(reverse('dashboard_publico')))
+        admin_user = get_user_model().objects.create_superuser('admin', 'admin@emi.edu.bo', 'clave-segura')
+        self.client.force_login(admin_user)
+        self.assertIn('Server-Timing', self.client.get(reverse('dashboard_publico')))
+
+    def test_histograma_solo_para_staff(self):
+        self.client.get(reverse('dashboard_publico'))
+        self.assertEqual(self.client.get(reverse('metricas_rendimiento')).status_code, 302)
+
+        admin_user = get_user_model().objects.create_superuser('admin', 'admin@emi.edu.bo', 'clave-segura')
+        self.client.force_login(admin_user)
+        datos = self.client.get(reverse('metricas_rendimiento')).json()
+        fila = datos['GET dashboard_publico']
+        self.assertEqual(fila['muestras'], 1)
+        self.assertEqual(fila['consultas_max'], 2)
+        self.assertEqual(sum(fila['histograma'].values()), 1)
+
+    @override_settings(INSTRUMENTACION_MAX_VISTAS=2)
+    def test_claves_acotadas(self):
+        self.client.generic('FOOBAR', reverse('dashboard_publico'))
+        self.client.get(reverse('dashboard_publico'))
+        self.client.get('/no-existe-1/')
+        self.client.post(reverse('dashboard_publico'))
+        self.assertEqual(
+            set(instrumentacion.resumen()),
+            {'OTHER dashboard_publico', 'GET dashboard_publico', instrumentacion.CLAVE_DESBORDE},
+        )
+        self.assertEqual(instrumentacion.resumen()[instrumentacion.CLAVE_DESBORDE]['muestras'], 2)
+
+
+class ListadoAdminTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        categorias = [
+            Categoria.objects.create(nombre=f"Cat {i}", email_responsable=f"resp{i}@emi.edu.bo")
+            for i in range(5)
+        ]
+        Ticket.objects.bulk_create([
+            Ticket(usuario_hash='x' * 64, categoria=categorias[i % 5], asunto=f"Asunto {i}", descripcion="d" * 2000)
+            for i in range(100)
+        ])
+        cls.admin_user = get_user_model().objects.create_superuser('admin', 'admin@emi.edu.bo', 'clave-segura')
+
+    def setUp(self):
+        self.client.force_login(self.admin_user)
+
+    def test_pagina_de_100_filas_con_presupuesto_fijo(self):
+        url = reverse('admin:tickets_ticket_changelist')
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(url)
+        self.assertEqual(len(response.context['cl'].result_list), 100)
+        self.assertLessEqual(len(consultas), 8)
+        self.assertFalse(any('"tickets_categoria"."id" =' in q['sql'] for q in consultas.captured_queries))
+        listado = next(q['sql'] for q in consultas.captured_queries if 'INNER JOIN "tickets_categoria"' in q['sql'])
+        self.assertNotIn('"descripcion"', listado)
+
+    def test_enlace_de_detalle(self):
+        ticket = Ticket.objects.first()
+        response = self.client.get(reverse('admin:tickets_ticket_changelist'))
+        self.assertContains(response, reverse('admin:tickets_ticket_change', args=[ticket.pk]))
+
+
+class TransicionesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.categoria = Categoria.objects.create(nombre="Cat", email_responsable="resp@emi.edu.bo")
+        Ticket.objects.bulk_create([
+            Ticket(usuario_hash='x' * 64, categoria=cls.categoria, asunto=f"A{i}", descripcion="d",
+                   estado='PEND' if i < 7 else 'RES')
+            for i in range(10)
+        ])
+        Ticket.objects.update(fecha_actualizacion=timezone.now() - timedelta(days=3))
+
+    def test_por_lotes_con_auditoria_y_fecha(self):
+        with CaptureQueriesContext(connection) as consultas:
+            cambiados = cambiar_estado(Ticket.objects.all(), Ticket.Estado.RESUELTO, lote=3)
+        self.assertEqual(cambiados, 7)
+        actualizaciones = [q for q in consultas.captured_queries if q['sql'].startswith('UPDATE "tickets_ticket"')]
+        self.assertEqual(len(actualizaciones), 3)
+
+        eventos = TicketEvento.objects.all()
+        self.assertEqual(eventos.count(), 7)
+        self.assertEqual(set(eventos.values_list('estado_anterior', 'estado_nuevo')), {('PEND', 'RES')})
+        self.assertEqual(Ticket.objects.filter(fecha_actualizacion__gt=timezone.now() - timedelta(minutes=1)).count(), 7)
+        self.assertEqual(reconciliar(), {})
+
+    def test_comando(self):
+        salida = StringIO()
+        call_command('cambiar_estado_tickets', 'PROC', '--desde', 'PEND', '--lote', '2', stdout=salida)
+        self.assertIn("7 tickets", salida.getvalue())
+        self.assertEqual(TicketEvento.objects.filter(origen='CMD').count(), 7)
+        self.assertEqual(Ticket.objects.filter(estado='PROC').count(), 7)
+
+
+class HistorialEstadosTests(TestCase):
+    def setUp(self):
+        self.categoria = Categoria.objects.create(nombre="Cat", email_responsable="resp@emi.edu.bo")
+
+    def _resuelto_en(self, horas):
+        ticket = Ticket.objects.create(usuario_hash='x' * 64, categoria=self.categoria, asunto="A", descripcion="d")
+        with mock.patch('django.utils.timezone.now', return_value=ticket.fecha_creacion + timedelta(hours=horas)):
+            ticket.estado = Ticket.Estado.RESUELTO
+            ticket.save()
+        return ticket
+
+    def test_save_registra_creacion_y_transicion(self):
+        ticket = self._resuelto_en(2)
+        self.assertEqual(
+            list(ticket.eventos.order_by('fecha').values_list('estado_anterior', 'estado_nuevo')),
+            [('', 'PEND'), ('PEND', 'RES')],
+        )
+        ticket.asunto = "Otro asunto"
+        ticket.save()
+        self.assertEqual(ticket.eventos.count(), 2)
+
+    def test_mediana_por_categoria_cuenta_solo_la_primera_resolucion(self):
+        for horas in (1, 3, 10):
+            ticket = self._resuelto_en(horas)
+        with mock.patch('django.utils.timezone.now', return_value=ticket.fecha_creacion + timedelta(hours=20)):
+            cambiar_estado(Ticket.objects.filter(pk=ticket.pk), Ticket.Estado.EN_PROCESO)
+            cambiar_estado(Ticket.objects.filter(pk=ticket.pk), Ticket.Estado.RESUELTO)
+
+        with self.assertNumQueries(1):
+            medianas = mediana_resolucion_por_categoria()
+        self.assertEqual(medianas[self.categoria.pk], (timedelta(hours=3), 3))
+
+        self.client.force_login(get_user_model().objects.create_superuser('admin', 'admin@emi.edu.bo', 'clave'))
+        self.assertContains(self.client.get(reverse('admin:tickets_categoria_changelist')), "3 h 0 min (3 resueltos)")
+
+
+class ResumenCategoriasTests(TestCase):
+    def test_resumen_diario_y_pagina_publica(self):
+        categoria = Categoria.objects.create(nombre="Infraestructura", email_responsable="resp@emi.edu.bo")
+        Categoria.objects.create(nombre="Biblioteca", email_responsable="bib@emi.edu.bo")
+        for horas in (1, 2, 3, 4, 10):
+            ticket = Ticket.objects.create(usuario_hash='x' * 64, categoria=categoria, asunto="A", descripcion="d")
+            with mock.patch('django.utils.timezone.now', return_value=ticket.fecha_creacion + timedelta(hours=horas)):
+                cambiar_estado(Ticket.objects.filter(pk=ticket.pk), Ticket.Estado.RESUELTO)
+        Ticket.objects.create(usuario_hash='x' * 64, categoria=categoria, asunto="A", descripcion="d")
+
+        call_command('resumir_categorias', stdout=StringIO())
+        call_command('resumir_categorias', stdout=StringIO())  # idempotente en el mismo día
+        fila = ResumenCategoria.objects.get(categoria=categoria)
+        self.assertEqual((fila.abiertos, fila.resueltos_30d), (1, 5))
+        self.assertEqual(fila.mediana_resolucion, timedelta(hours=3))
+        self.assertEqual(fila.p90_resolucion, timedelta(hours=7.6))
+        self.assertEqual(ResumenCategoria.objects.count(), 2)
+
+        response = self.client.get(reverse('dashboard_publico'))
+        self.assertEqual([c['nombre'] for c in response.context['categorias']], ["Biblioteca", "Infraestructura"])
+        self.assertContains(response, "3 h 0 min")
+        self.assertContains(response, "7 h 36 min")
+
+
+class SerieTicketsTests(TestCase):
+    def setUp(self):
+        limpiar_caches()
+        self.categoria = Categoria.objects.create(nombre="Aulas", email_responsable="resp@emi.edu.bo")
+        ahora = timezone.now()
+        for dias, estado in [(0, 'PEND'), (1, 'PEND'), (1, 'RES'), (1, 'RECH'), (40, 'PROC')]:
+            ticket = Ticket.objects.create(
+                usuario_hash='x' * 64, categoria=self.categoria, asunto="A", descripcion="d", estado=estado
+            )
+            Ticket.objects.filter(pk=ticket.pk).update(fecha_creacion=ahora - timedelta(days=dias))
+
+    def _serie(self, **params):
+        return self.client.get(reverse('serie_tickets'), params).json()['series']
+
+    def test_por_dia_sin_spam(self):
+        series_dia = self._serie(periodo='dia', cantidad=3)
+        self.assertEqual([b['total'] for b in series_dia], [0, 2, 1])
+        self.assertEqual(series_dia[1]['por_estado'], {'PEND': 1, 'RES': 1})
+        self.assertEqual(series_dia[1]['por_categoria'], {'Aulas': 2})
+        self.assertEqual([b['cerrado'] for b in series_dia], [True, True, False])
+        self.assertEqual(sum(b['total'] for b in self._serie(periodo='mes', cantidad=3)), 4)
+        self.assertEqual(sum(b['total'] for b in self._serie(periodo='semana', cantidad=10)), 4)
+
+    def test_periodos_cerrados_desde_cache_hasta_un_cambio_de_estado(self):
+        self._serie(periodo='dia', cantidad=3)
+        # Un ticket nuevo fechado ayer (sin pasar por invalidar) no cambia el período cerrado en caché
+        nuevo = Ticket.objects.create(usuario_hash='x' * 64, categoria=self.categoria, asunto="A", descripcion="d")
+        Ticket.objects.filter(pk=nuevo.pk).update(fecha_creacion=timezone.now() - timedelta(days=1))
+        caches['series'].delete(series.claves('dia', timezone.localdate())[1])
+
+        with CaptureQueriesContext(connection) as consultas:
+            series_dia = self._serie(periodo='dia', cantidad=3)
+        self.assertEqual(sum('"tickets_ticket"' in q['sql'] for q in consultas.captured_queries), 1)
+        self.assertEqual([b['total'] for b in series_dia], [0, 2, 1])
+
+        cambiar_estado(Ticket.objects.filter(estado='PEND'), Ticket.Estado.RESUELTO)
+        self.assertEqual(self._serie(periodo='dia', cantidad=3)[1]['por_estado'], {'RES': 3})
+
+    def test_cantidades_distintas_comparten_las_claves(self):
+        for cantidad in (5, 30, 366):
+            self._serie(periodo='dia', cantidad=cantidad)
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertEqual(len(self._serie(periodo='dia', cantidad=100)), 100)
+        self.assertFalse(any('"tickets_ticket"' in q['sql'] for q in consultas.captured_queries))
+        # generación + cerrados + actual, y nada en el caché por defecto (sesiones, etc.)
+        self.assertEqual(len(caches['series']._cache), 3)
+        self.assertEqual(len(cache._cache), 0)
+
+    def test_periodo_invalido(self):
+        self.assertEqual(self.client.get(reverse('serie_tickets'), {'periodo': 'anio'}).status_code, 400)
+
+
+class ApiTransparenciaTests(TestCase):
+    def setUp(self):
+        categoria = Categoria.objects.create(nombre="Aulas", email_responsable="resp@emi.edu.bo")
+        self.ticket = Ticket.objects.create(usuario_hash='x' * 64, categoria=categoria, asunto="A", descripcion="d")
+
+    def test_json_compacto_y_304_con_etag(self):
+        response = self.client.get(reverse('api_transparencia'))
+        self.assertEqual(response.json()['pendientes'], 1)
+        self.assertEqual(response.json()['ultimos'][0]['categoria'], "Aulas")
+        self.assertNotIn(b', ', response.content)
+        self.assertIn('no-cache', response['Cache-Control'])
+
+        with self.assertNumQueries(1):
+            no_modificado = self.client.get(reverse('api_transparencia'), HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(no_modificado.status_code, 304)
+        self.assertEqual(no_modificado.content, b'')
+
+    def test_cambio_de_estado_cambia_el_etag(self):
+        etag = self.client.get(reverse('api_transparencia'))['ETag']
+        cambiar_estado(Ticket.objects.all(), Ticket.Estado.RESUELTO)
+        response = self.client.get(reverse('api_transparencia'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['resueltos'], 1)
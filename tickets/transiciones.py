@@ -0,0 +1,59 @@
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import series
+from .models import Ticket, TicketEvento
+from .transparencia import aplicar_deltas, refrescar_ultimos
+
+
+def _aplicar_lote(ids, estado, usuario, origen):
+    with transaction.atomic():
+        # Se relee el estado con bloqueo: solo las filas de este lote, y solo hasta el commit
+        anteriores = list(
+            Ticket.objects.select_for_update()
+            .filter(pk__in=ids)
+            .exclude(estado=estado)
+            .values_list('pk', 'estado')
+        )
+        if not anteriores:
+            return 0
+        ahora = timezone.now()
+        # update() no dispara auto_now: fecha_actualizacion se asigna a mano
+        Ticket.objects.filter(pk__in=[pk for pk, _ in anteriores]).update(
+            estado=estado, fecha_actualizacion=ahora
+        )
+        TicketEvento.objects.bulk_create([
+            TicketEvento(
+                ticket_id=pk, estado_anterior=anterior, estado_nuevo=estado,
+                fecha=ahora, usuario=usuario, origen=origen,
+            )
+            for pk, anterior in anteriores
+        ])
+        deltas = {estado: len(anteriores)}
+        for _, anterior in anteriores:
+            deltas[anterior] = deltas.get(anterior, 0) - 1
+        aplicar_deltas(deltas, refrescar_ultimos=False)
+    return len(anteriores)
+
+
+def cambiar_estado(queryset, estado, usuario=None, origen=TicketEvento.Origen.ADMIN, lote=None):
+    """Cambia el estado de los tickets del queryset por lotes ordenados por pk.
+
+    Cada lote es una transacción corta: actualiza estado y fecha_actualizacion, registra un
+    TicketEvento por ticket y mueve los contadores del snapshot. Devuelve cuántos cambiaron."""
+    lote = lote or settings.TRANSICIONES_LOTE
+    pendientes = queryset.exclude(estado=estado).order_by('pk')
+    total = 0
+    ultimo = None
+    while True:
+        tramo = pendientes if ultimo is None else pendientes.filter(pk__gt=ultimo)
+        ids = list(tramo.values_list('pk', flat=True)[:lote])
+        if not ids:
+            break
+        total += _aplicar_lote(ids, estado, usuario, origen)
+        ultimo = ids[-1]
+    if total:
+        refrescar_ultimos()
+        series.invalidar()
+    return total
@@ -0,0 +1,130 @@
+import hashlib
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, F, Subquery
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .estadisticas import resoluciones, tiempos_resolucion_por_categoria
+from .models import Categoria, DashboardSnapshot, ResumenCategoria, Ticket
+
+SNAPSHOT_PK = 1
+
+CAMPO_POR_ESTADO = {
+    Ticket.Estado.PENDIENTE: 'pendientes',
+    Ticket.Estado.EN_PROCESO: 'en_proceso',
+    Ticket.Estado.RESUELTO: 'resueltos',
+    Ticket.Estado.RECHAZADO: 'rechazados',
+}
+
+
+def _calcular_ultimos():
+    tickets = (
+        Ticket.objects.exclude(estado=Ticket.Estado.RECHAZADO)
+        .select_related('categoria')
+        .only('fecha_creacion', 'estado', 'categoria__nombre')
+        .order_by('-fecha_creacion')[:10]
+    )
+    return [
+        {
+            'categoria': ticket.categoria.nombre,
+            'fecha_creacion': ticket.fecha_creacion.isoformat(),
+            'estado': ticket.estado,
+        }
+        for ticket in tickets
+    ]
+
+
+def reconciliar():
+    """Recalcula el snapshot desde la tabla de tickets. Devuelve {campo: (antes, despues)} con las diferencias."""
+    conteos = dict(Ticket.objects.values_list('estado').annotate(n=Count('id')).order_by())
+    valores = {campo: conteos.get(estado, 0) for estado, campo in CAMPO_POR_ESTADO.items()}
+
+    with transaction.atomic():
+        snapshot, _ = DashboardSnapshot.objects.select_for_update().get_or_create(pk=SNAPSHOT_PK)
+        diferencias = {
+            campo: (getattr(snapshot, campo), valor)
+            for campo, valor in valores.items()
+            if getattr(snapshot, campo) != valor
+        }
+        for campo, valor in valores.items():
+            setattr(snapshot, campo, valor)
+        snapshot.ultimos = _calcular_ultimos()
+        snapshot.save()
+    return diferencias
+
+
+def obtener_snapshot():
+    snapshot = DashboardSnapshot.objects.filter(pk=SNAPSHOT_PK).first()
+    if snapshot is None:
+        reconciliar()
+        snapshot = DashboardSnapshot.objects.get(pk=SNAPSHOT_PK)
+    return snapshot
+
+
+def aplicar_deltas(deltas, refrescar_ultimos=True):
+    # deltas: {estado: +n/-n}. Se aplica con F() para que dos escrituras concurrentes no se pisen.
+    # Dos guardados concurrentes pueden restar dos veces el mismo estado: el contador se acota en 0
+    # (es PositiveIntegerField) y reconciliar_dashboard corrige el desvío.
+    cambios = {
+        CAMPO_POR_ESTADO[estado]: Greatest(F(CAMPO_POR_ESTADO[estado]) + delta, 0) if delta < 0
+        else F(CAMPO_POR_ESTADO[estado]) + delta
+        for estado, delta in deltas.items()
+        if delta
+    }
+    if refrescar_ultimos:
+        cambios['ultimos'] = _calcular_ultimos()
+    if not cambios:
+        return
+    # update() no dispara auto_now; "actualizado" alimenta el ETag/Last-Modified de la API
+    cambios['actualizado'] = timezone.now()
+    if not DashboardSnapshot.objects.filter(pk=SNAPSHOT_PK).update(**cambios):
+        reconciliar()
+
+
+def refrescar_ultimos():
+    aplicar_deltas({})
+
+
+def etag_snapshot(snapshot):
+    return hashlib.sha1(
+        f"{snapshot.actualizado.isoformat()}:{snapshot.pendientes}:{snapshot.en_proceso}:"
+        f"{snapshot.resueltos}:{snapshot.rechazados}".encode()
+    ).hexdigest()[:16]
+
+
+def resumir_categorias(fecha=None, dias=30):
+    """Guarda el resumen del día por categoría: abiertos, resueltos en `dias` días y mediana/p90
+    de resolución en esa ventana. Son tres consultas agrupadas más una escritura por categoría."""
+    fecha = fecha or timezone.localdate()
+    desde = timezone.now() - timedelta(days=dias)
+    abiertos = dict(
+        Ticket.objects.filter(estado__in=[Ticket.Estado.PENDIENTE, Ticket.Estado.EN_PROCESO])
+        .values_list('categoria').annotate(n=Count('id')).order_by()
+    )
+    tiempos = tiempos_resolucion_por_categoria(resoluciones().filter(fecha__gte=desde), fracciones=(0.5, 0.9))
+
+    with transaction.atomic():
+        for categoria_id in Categoria.objects.values_list('pk', flat=True):
+            datos = tiempos.get(categoria_id, {})
+            ResumenCategoria.objects.update_or_create(
+                fecha=fecha, categoria_id=categoria_id,
+                defaults={
+                    'abiertos': abiertos.get(categoria_id, 0),
+                    'resueltos_30d': datos.get('resueltos', 0),
+                    'mediana_resolucion': datos.get(0.5),
+                    'p90_resolucion': datos.get(0.9),
+                },
+            )
+    return fecha
+
+
+def resumen_publico():
+    """Filas del último resumen diario (una por categoría) en una sola consulta."""
+    ultima = ResumenCategoria.objects.order_by('-fecha').values('fecha')[:1]
+    return list(
+        ResumenCategoria.objects.filter(fecha=Subquery(ultima))
+        .select_related('categoria')
+        .order_by('categoria__nombre')
+    )
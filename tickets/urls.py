@@ -9,6 +9,11 @@ urlpatterns = [
     
     path('exito/', views.pagina_exito, name='pagina_exito'),
     path('transparencia/', views.dashboard_publico, name='dashboard_publico'),
+    path('transparencia/api/', views.api_transparencia, name='api_transparencia'),
+    path('transparencia/serie/', views.serie_tickets, name='serie_tickets'),
 
     path('salir/', views.cerrar_sesion, name='cerrar_sesion'),
+
+    path('tareas/procesar-correos/', views.tarea_procesar_correos, name='tarea_procesar_correos'),
+    path('tareas/procesar-informes/', views.tarea_procesar_informes, name='tarea_procesar_informes'),
 ]
\ No newline at end of file
@@ -1,49 +1,29 @@
-import random
-import hashlib
-import threading
+import logging
+
 from django.shortcuts import render, redirect
-from django.contrib import messages
 from django.conf import settings
-from django.core.mail import send_mail
-from django.db.models import Count 
-from .models import Ticket
+from django.http import JsonResponse
+from django.utils.crypto import constant_time_compare
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+from django.contrib import messages
+from django.db import transaction
+from .models import Categoria
 from .forms import TicketForm, SolicitudAccesoForm, ValidarCodigoForm
+from . import informes, limites, otp, series
+from .anonimato import generar_hash_anonimo, version_actual
+from .correo import encolar_correo, procesar_pendientes
+from .deteccion import analizar_ticket
+from .estadisticas import formatear_duracion
+from .transparencia import etag_snapshot, obtener_snapshot, resumen_publico
 
-class EmailThread(threading.Thread):
-    def __init__(self, subject, message, from_email, recipient_list):
-        self.subject = subject
-        self.message = message
-        self.from_email = from_email
-        self.recipient_list = recipient_list
-        threading.Thread.__init__(self)
-
-    def run(self):
-        try:
-            print(f"--> Iniciando envío background a {self.recipient_list}...")
-            send_mail(
-                self.subject,
-                self.message,
-                self.from_email,
-                self.recipient_list,
-                fail_silently=False,
-            )
-            print("--> Correo enviado exitosamente (Background)")
-        except Exception as e:
-            print(f"--> ERROR ENVIANDO CORREO BACKGROUND: {e}")
+logger = logging.getLogger(__name__)
 
+def verificar_alertas(ticket, coincidencias=None):
+    if coincidencias is None:
+        coincidencias = analizar_ticket(ticket)
 
-PALABRAS_CLAVE = ['robo', 'fuego', 'incendio', 'acoso', 'golpe', 'sangre', 'amenaza', 'urgente']
-SPAM = ['puta', 'puto', 'pt', 'pta', 'ptm', 'mierda', 'mrd', 'mrda', 'carajo', 'crj', 'coño', 'joder', 'jdr', 'culo', 'klo', 'verga', 'vrg', 'vga', 'pija', 'cabrón', 'cabron', 'cbron', 'pelotudo', 'pelotuda', 'pltd', 'imbécil', 'imbecil', 'imb', 'idiota', 'idio', 'estúpido', 'estupido', 'stpd', 'pendejo', 'pendeja', 'pndj', 'chupa', 'chupala', 'mierdero', 'mamón', 'mamon', 'mmn', 'gil', 'gilazo', 'cojudo', 'cojuda', 'kjd', 'huevón', 'huevon', 'wevon', 'wvon', 'huevada', 'webada', 'wbda', 'cagado', 'cagada', 'cgd', 'zorra', 'perra', 'maldito', 'maldita', 'asqueroso', 'asquerosa', 'hijo de puta', 'hdp', 'la puta', 'lpt']
-
-def generar_hash_anonimo(identificador):
-    salt = settings.SECRET_KEY
-    texto_a_hashear = f"{identificador}{salt}"
-    return hashlib.sha256(texto_a_hashear.encode('utf-8')).hexdigest()
-
-def verificar_alertas(ticket):
-    texto_completo = f"{ticket.asunto} {ticket.descripcion}".lower()
-    
-    if any(palabra in texto_completo for palabra in PALABRAS_CLAVE):
+    if coincidencias.alertas:
         campo_emails = ticket.categoria.email_responsable or 'dmurielv@est.emi.edu.bo'
 
         lista_destinatarios = [email.strip() for email in campo_emails.split(',')]
@@ -54,31 +34,23 @@ def verificar_alertas(ticket):
         Categoría: {ticket.categoria.nombre}
         Descripción: {ticket.descripcion}
         """
-        try:
-            send_mail(
-                asunto,
-                mensaje,
-                settings.DEFAULT_FROM_EMAIL,
-                lista_destinatarios,
-                fail_silently=False
-            )
-            print(f"--> Alerta enviada a: {lista_destinatarios}")
-        except Exception as e:
-            print(f"--> Error enviando alerta: {e}")
+        encolar_correo(asunto, mensaje, lista_destinatarios)
+        logger.info("Alerta encolada para el ticket %s", ticket.pk)
 
-def verificar_spam(ticket):
-    texto_completo = f"{ticket.asunto} {ticket.descripcion}".lower()
+def verificar_spam(ticket, coincidencias=None):
+    if coincidencias is None:
+        coincidencias = analizar_ticket(ticket)
 
-    if any(palabra in texto_completo for palabra in SPAM):
-        destinatario = ticket.categoria.email.responsable
+    if coincidencias.spam:
+        destinatario = ticket.categoria.email_responsable
         if not destinatario:
             destinatario = 'dmurielv@est.emi.edu.bo'
 
-        print(f"⚠️ SPAM DETECTADO: Enviando correo a {destinatario}...")
+        logger.info("Spam detectado en el ticket %s", ticket.pk)
         
-        send_mail(
-            subject=f'ALERTA DE SPAM: {ticket.categoria.nombre} - {ticket.asunto}',
-            message=f"""
+        encolar_correo(
+            asunto=f'ALERTA DE SPAM: {ticket.categoria.nombre} - {ticket.asunto}',
+            mensaje=f"""
             SE HA REPORTADO UN INTENTO DE SPAM.
             POR FAVOR INGRESE AL SISTEMA Y ELIMINE EL REPORTE MARCADO COMO SPAM.
             
@@ -90,35 +62,34 @@ def verificar_spam(ticket):
             -------------------------------------
             Este es un mensaje automático del Sistema de Buzón EMI.
             """,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[destinatario],
-            fail_silently=False,
+            destinatarios=[destinatario],
         )
 
+def _demasiados_intentos(request, plantilla, context):
+    messages.error(request, "Demasiados intentos. Espera un momento antes de volver a intentarlo.")
+    return render(request, plantilla, context, status=429)
+
 def solicitar_acceso(request):
     if request.method == 'POST':
         form = SolicitudAccesoForm(request.POST)
+        if not limites.consumir('otp_ip', limites.ip_cliente(request)):
+            return _demasiados_intentos(request, 'tickets/login.html', {'form': form})
         if form.is_valid():
             email = form.cleaned_data['email']
-            codigo = str(random.randint(100000, 999999))
-            
-            request.session['otp_codigo'] = codigo
-            request.session['otp_email'] = email
+            if not limites.consumir('otp_email', email.lower()):
+                return _demasiados_intentos(request, 'tickets/login.html', {'form': form})
+            codigo = otp.generar_codigo()
+
+            response = redirect('validar_codigo')
+            otp.iniciar(request, response, email, codigo)
             
-            try:
-                print(f"--> Intentando enviar correo a {email}...")
-                send_mail(
-                    'Tu Código de Acceso - Buzón EMI',
-                    f'Tu código de verificación es: {codigo}\n\nÚsalo para ingresar al sistema.',
-                    settings.DEFAULT_FROM_EMAIL,
-                    [email],
-                    fail_silently=False,
-                )
-                print("--> ¡Correo enviado con éxito!")
-            except Exception as e:
-                print(f"--> ERROR AL ENVIAR CORREO: {e}")
+            encolar_correo(
+                'Tu Código de Acceso - Buzón EMI',
+                f'Tu código de verificación es: {codigo}\n\nÚsalo para ingresar al sistema.',
+                [email],
+            )
             
-            return redirect('validar_codigo')
+            return response
             
     else:
         form = SolicitudAccesoForm()
@@ -127,33 +98,50 @@ def solicitar_acceso(request):
 
 
 def validar_codigo(request):
-    if 'otp_email' not in request.session:
+    if request.method == 'POST' and not limites.consumir('validar_ip', limites.ip_cliente(request)):
+        return _demasiados_intentos(request, 'tickets/validar.html', {'form': ValidarCodigoForm()})
+    email = otp.email_pendiente(request)
+    if not email:
         return redirect('solicitar_acceso')
     if request.method == 'POST':
         form = ValidarCodigoForm(request.POST)
+        if not limites.consumir('validar_email', email.lower()):
+            return _demasiados_intentos(request, 'tickets/validar.html', {'email': email, 'form': form})
         if form.is_valid():
-            if form.cleaned_data['codigo'] == request.session.get('otp_codigo'):
-                request.session['es_estudiante_validado'] = True
-                del request.session['otp_codigo']
-                return redirect('crear_queja')
+            if otp.verificar(request, form.cleaned_data['codigo']):
+                response = redirect('crear_queja')
+                otp.marcar_validado(request, response)
+                return response
             else:
                 messages.error(request, "Código incorrecto.")
     else:
         form = ValidarCodigoForm()
-    return render(request, 'tickets/validar.html', {'email': request.session['otp_email'], 'form': form})
+    return render(request, 'tickets/validar.html', {'email': email, 'form': form})
 
 def crear_queja(request):
-    if not request.session.get('es_estudiante_validado'):
+    email_validado = otp.email_validado(request)
+    if not email_validado:
         return redirect('solicitar_acceso')
     if request.method == 'POST':
         form = TicketForm(request.POST, request.FILES)
         if form.is_valid():
+            usuario_hash = generar_hash_anonimo(email_validado)
+            # Descarte rápido antes del trabajo de Pillow; el que cuenta va dentro de la transacción
+            if limites.quejas_excedidas(usuario_hash):
+                return _demasiados_intentos(request, 'tickets/crear_queja.html', {'form': form})
             ticket = form.save(commit=False)
-            email_validado = request.session.get('otp_email', "error_sesion")
-            ticket.usuario_hash = generar_hash_anonimo(email_validado)
-            ticket.save()
-            verificar_alertas(ticket)
-            verificar_spam(ticket)
+            ticket.usuario_hash = usuario_hash
+            ticket.hash_version = version_actual()
+            coincidencias = analizar_ticket(ticket)
+            # El trabajo de Pillow va fuera de la transacción, que solo guarda los archivos listos
+            ticket.preparar_imagen()
+            with transaction.atomic():
+                limites.bloquear_reportante(usuario_hash)
+                if limites.quejas_excedidas(usuario_hash):
+                    return _demasiados_intentos(request, 'tickets/crear_queja.html', {'form': form})
+                ticket.save()
+                verificar_alertas(ticket, coincidencias)
+                verificar_spam(ticket, coincidencias)
             return redirect('pagina_exito')
     else:
         form = TicketForm()
@@ -163,18 +151,100 @@ def pagina_exito(request):
     return render(request, 'tickets/exito.html')
 
 def dashboard_publico(request):
-    tickets = Ticket.objects.exclude(estado='RECH')
+    # Lee filas precalculadas (snapshot y resumen diario por categoría); no toca la tabla de tickets
+    snapshot = obtener_snapshot()
+    categorias = [
+        {
+            'nombre': fila.categoria.nombre,
+            'abiertos': fila.abiertos,
+            'resueltos_30d': fila.resueltos_30d,
+            'mediana': formatear_duracion(fila.mediana_resolucion),
+            'p90': formatear_duracion(fila.p90_resolucion),
+        }
+        for fila in resumen_publico()
+    ]
     context = {
-        'total': tickets.count(),
-        'resueltos': tickets.filter(estado='RES').count(),
-        'en_proceso': tickets.filter(estado='PROC').count(),
-        'pendientes': tickets.filter(estado='PEND').count(),
-        'ultimos_tickets': tickets.order_by('-fecha_creacion')[:10],
+        'total': snapshot.total,
+        'resueltos': snapshot.resueltos,
+        'en_proceso': snapshot.en_proceso,
+        'pendientes': snapshot.pendientes,
+        'ultimos_tickets': snapshot.ultimos_tickets(),
+        'categorias': categorias,
     }
     return render(request, 'tickets/dashboard.html', context)
 
+def _snapshot_de(request):
+    # condition() pide ETag y Last-Modified por separado: una sola lectura por request
+    if not hasattr(request, '_snapshot'):
+        request._snapshot = obtener_snapshot()
+    return request._snapshot
+
+@condition(
+    etag_func=lambda request: etag_snapshot(_snapshot_de(request)),
+    last_modified_func=lambda request: _snapshot_de(request).actualizado,
+)
+def api_transparencia(request):
+    # Si el ETag coincide, condition() responde 304 antes de llegar aquí
+    snapshot = _snapshot_de(request)
+    response = JsonResponse(
+        {
+            'total': snapshot.total,
+            'resueltos': snapshot.resueltos,
+            'en_proceso': snapshot.en_proceso,
+            'pendientes': snapshot.pendientes,
+            'ultimos': snapshot.ultimos,
+            'actualizado': snapshot.actualizado.isoformat(),
+        },
+        json_dumps_params={'separators': (',', ':'), 'ensure_ascii': False},
+    )
+    patch_cache_control(response, no_cache=True)
+    return response
+
 def cerrar_sesion(request):
-    for key in ['es_estudiante_validado', 'otp_email', 'otp_codigo']:
-        if key in request.session:
-            del request.session[key]
-    return redirect('solicitar_acceso')
\ No newline at end of file
+    response = redirect('solicitar_acceso')
+    otp.cerrar(request, response)
+    return response
+
+def serie_tickets(request):
+    # ?periodo=dia|semana|mes&cantidad=N  (tickets sin spam, por fecha de creación)
+    periodo = request.GET.get('periodo', 'dia')
+    if periodo not in series.PERIODOS:
+        return JsonResponse({'error': f"periodo debe ser uno de: {', '.join(series.PERIODOS)}"}, status=400)
+    try:
+        cantidad = int(request.GET.get('cantidad', 0)) or None
+    except ValueError:
+        return JsonResponse({'error': "cantidad debe ser un número"}, status=400)
+
+    nombres = dict(Categoria.objects.values_list('pk', 'nombre'))
+    datos = [
+        {
+            **bucket,
+            'por_categoria': {
+                nombres.get(int(pk), pk): n for pk, n in bucket['por_categoria'].items()
+            },
+        }
+        for bucket in series.serie(periodo, cantidad)
+    ]
+    return JsonResponse({'periodo': periodo, 'series': datos})
+
+def _cron_autorizado(request):
+    # Cron de Vercel: envía "Authorization: Bearer <CRON_SECRET>"
+    esperado = f"Bearer {settings.CRON_SECRET}"
+    return bool(settings.CRON_SECRET) and constant_time_compare(request.headers.get('Authorization', ''), esperado)
+
+def tarea_procesar_correos(request):
+    if not _cron_autorizado(request):
+        return JsonResponse({'error': "No autorizado"}, status=403)
+    enviados, fallidos = procesar_pendientes()
+    return JsonResponse({'enviados': enviados, 'fallidos': fallidos})
+
+def tarea_procesar_informes(request):
+    if not _cron_autorizado(request):
+        return JsonResponse({'error': "No autorizado"}, status=403)
+    # Pocos lotes por llamada: cada invocación tiene un tiempo máximo
+    reencolados, resultados = informes.procesar_cola(settings.INFORMES_LOTES_POR_TAREA)
+    return JsonResponse({
+        'reencolados': reencolados,
+        'listos': [lote_id for lote_id, listo in resultados if listo],
+        'fallidos': [lote_id for lote_id, listo in resultados if not listo],
+    })